@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmarks of the scoring functions and of the environment.
+
+Results are printed and optionally written as JSON. They can be saved as a
+baseline and later compared against it to catch regressions:
+
+    python benchmarks/bench_cribbage.py --save-baseline --runs 3
+    python benchmarks/bench_cribbage.py --compare
+
+The comparison exits with status 1 if any benchmark got slower than the
+baseline by more than its tolerance. Every result is the median of several
+runs, and the scoring benchmarks time whole batches of hands rather than
+single calls, which keeps timer overhead and noise down.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from gym_cribbage.envs.cribbage_env import (
+    Card,
+    CribbageEnv,
+    Deck,
+    RANKS,
+    SUITS,
+    Stack,
+    evaluate_cards,
+    evaluate_table,
+    is_sequence,
+    same_suit_points,
+)
+from gym_cribbage.envs.simulate import simulate
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline.json")
+
+# Fraction of the baseline throughput that can be lost before failing, and
+# larger tolerances of the benchmarks measuring single steps, whose timings
+# vary the most from run to run.
+TOLERANCE = 0.25
+TOLERANCES = {
+    "step_phase0": 0.35,
+    "step_phase1": 0.35,
+    "step_phase2": 0.35,
+}
+
+# Number of runs of each benchmark, of which the median is reported.
+REPEAT = 15
+
+
+def _per_second(func, n_items=1, repeat=REPEAT):
+    """
+    Median number of items per second over `repeat` runs of `func`, which
+    processes `n_items` items per call.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = timer.repeat(repeat=repeat, number=number)
+    return n_items * number / statistics.median(times)
+
+
+def _random_stacks(n_stacks, n_cards, seed=0):
+    rng = np.random.default_rng(seed)
+    deck = [Card(rank, suit) for rank, suit in itertools.product(RANKS, SUITS)]
+    return [Stack([deck[i] for i in rng.permutation(52)[:n_cards]])
+            for _ in range(n_stacks)]
+
+
+def bench_scoring():
+    hands = _random_stacks(64, 5)
+    tables = []
+    for hand in _random_stacks(64, 4, seed=1):
+        while sum(c.value for c in hand) > 31:
+            hand = Stack(hand.cards[:-1])
+        tables.append(hand)
+
+    splits = [(Stack(h.cards[:4]), h[4]) for h in hands]
+
+    def batch(func, items):
+        def run():
+            for item in items:
+                func(*item)
+        return _per_second(run, len(items))
+
+    return {
+        "evaluate_cards": batch(evaluate_cards, splits),
+        "evaluate_cards_crib": batch(
+            lambda h, s: evaluate_cards(h, s, True), splits),
+        "evaluate_table": batch(evaluate_table, [(t,) for t in tables]),
+        "is_sequence": batch(is_sequence, [(t,) for t in tables]),
+        "same_suit_points": batch(same_suit_points, splits),
+        "deck": _per_second(Deck),
+    }
+
+
+def _play(env, rng, step_times=None):
+    """Plays a game with random legal actions."""
+    env.reset()
+    done = False
+    while not done:
+        action = rng.choice(np.flatnonzero(env.action_mask))
+        phase = env.phase
+        start = time.perf_counter()
+        _, _, done, _ = env.step(action)
+        if step_times is not None:
+            step_times[phase].append(time.perf_counter() - start)
+
+
+def _median_rate(func, n_items, repeat=5):
+    """Median items per second over `repeat` timed calls of `func`."""
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        rates.append(n_items / (time.perf_counter() - start))
+    return statistics.median(rates)
+
+
+def bench_env(n_games=20):
+    results = {}
+
+    # Step times of every step of every run, as the median of the runs.
+    step_rates = [[], [], []]
+    for run in range(5):
+        env = CribbageEnv(n_players=2, seed=0)
+        rng = np.random.default_rng(0)
+        step_times = [[], [], []]
+        for _ in range(n_games):
+            _play(env, rng, step_times)
+        for phase, times in enumerate(step_times):
+            step_rates[phase].append(len(times) / sum(times))
+    for phase, rates in enumerate(step_rates):
+        results["step_phase{}".format(phase)] = statistics.median(rates)
+
+    # The same seeded games in every run.
+    def play_games(n_players):
+        env = CribbageEnv(n_players=n_players, seed=0)
+        rng = np.random.default_rng(0)
+        for _ in range(n_games):
+            _play(env, rng)
+
+    for n_players in (2, 3, 4):
+        results["games_{}_players".format(n_players)] = _median_rate(
+            lambda: play_games(n_players), n_games)
+
+    # Same games without the gym interface.
+    def simulate_games(n_players):
+        rng = np.random.default_rng(0)
+
+        def random_policy(turn):
+            return turn.playable[rng.integers(len(turn.playable))]
+
+        simulate(n_games * 10, [random_policy] * n_players, seed=0)
+
+    for n_players in (2, 3, 4):
+        results["simulate_{}_players".format(n_players)] = _median_rate(
+            lambda: simulate_games(n_players), n_games * 10)
+
+    return results
+
+
+def run(n_games=20, n_runs=1):
+    """Results of every benchmark, the median of `n_runs` full runs."""
+    runs = []
+    for _ in range(n_runs):
+        results = {}
+        results.update(bench_scoring())
+        results.update(bench_env(n_games))
+        runs.append(results)
+    return {name: statistics.median(r[name] for r in runs)
+            for name in runs[0]}
+
+
+def compare(results, baseline, tolerance=None):
+    """
+    Returns the benchmarks whose throughput dropped by more than their
+    tolerance compared to the baseline, as {name: (baseline, result)}. The
+    tolerance of each benchmark is that of TOLERANCES, or `tolerance` for
+    every benchmark if given.
+    """
+    regressions = {}
+    for name, expected in baseline.items():
+        limit = tolerance if tolerance is not None else \
+            TOLERANCES.get(name, TOLERANCE)
+        if name in results and results[name] < expected * (1 - limit):
+            regressions[name] = (expected, results[name])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="Write the results to this file.")
+    parser.add_argument("--baseline", default=BASELINE,
+                        help="Baseline file (default: %(default)s).")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Save the results as the new baseline.")
+    parser.add_argument("--compare", action="store_true",
+                        help="Compare the results against the baseline.")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Tolerance of every benchmark (default: "
+                             "{}, more for single steps).".format(TOLERANCE))
+    parser.add_argument("--games", type=int, default=20,
+                        help="Number of games played per benchmark.")
+    parser.add_argument("--runs", type=int, default=1,
+                        help="Report the median of this many full runs, "
+                             "e.g. 3 when saving a baseline.")
+    args = parser.parse_args(argv)
+
+    results = run(args.games, args.runs)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    for name, value in sorted(results.items()):
+        print("{:24s} {:14.1f} /s".format(name, value))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, (expected, value) in sorted(regressions.items()):
+            print("REGRESSION {}: {:.1f} /s, baseline {:.1f} /s".format(
+                name, value, expected))
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
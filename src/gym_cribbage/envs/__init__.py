@@ -5,3 +5,4 @@
 # @Last Modified time: 2019-03-17 17:20:31
 
 from gym_cribbage.envs.cribbage_env import CribbageEnv
+from gym_cribbage.envs.vector_env import CribbageVectorEnv
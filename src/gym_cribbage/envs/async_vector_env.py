@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Runs CribbageVectorEnv shards in worker processes. Actions, observations,
+rewards and action masks are exchanged through a single shared memory block,
+so stepping only sends a short command through a pipe to each worker.
+"""
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+from gym_cribbage.envs.core import N_CARDS
+from gym_cribbage.envs.vector_env import CribbageVectorEnv, VectorState, unpack
+
+
+def _buffer_layout(n_players):
+    """(name, dtype, shape per game) of every shared array."""
+    return [
+        ("actions", np.int64, ()),
+        ("hand", np.int64, ()),
+        ("action_mask", np.bool_, (N_CARDS,)),
+        ("hand_id", np.int64, ()),
+        ("reward_id", np.int64, ()),
+        ("phase", np.int64, ()),
+        ("player_score", np.int64, ()),
+        ("opponent_score", np.int64, (n_players - 1,)),
+        ("rewards", np.int64, ()),
+        ("dones", np.bool_, ()),
+    ]
+
+
+def _buffer_size(n_envs, n_players):
+    return sum(
+        n_envs * int(np.prod(shape)) * np.dtype(dtype).itemsize
+        for _, dtype, shape in _buffer_layout(n_players)
+    )
+
+
+def _shared_arrays(buf, n_envs, n_players):
+    """NumPy views of every shared array laid out in `buf`."""
+    arrays, offset = {}, 0
+    for name, dtype, shape in _buffer_layout(n_players):
+        array = np.ndarray((n_envs,) + shape, dtype=dtype, buffer=buf,
+                           offset=offset)
+        arrays[name] = array
+        offset += array.nbytes
+    return arrays
+
+
+def _write_state(arrays, state):
+    arrays["hand"][:] = state.hand
+    arrays["action_mask"][:] = unpack(state.hand)
+    arrays["hand_id"][:] = state.hand_id
+    arrays["reward_id"][:] = state.reward_id
+    arrays["phase"][:] = state.phase
+    arrays["player_score"][:] = state.player_score
+    arrays["opponent_score"][:] = state.opponent_score
+
+
+def _worker(remote, parent_remote, shm_name, n_envs, n_players, start, stop,
+            seed):
+    parent_remote.close()
+    # Workers share the resource tracker of the parent, which unlinks the block.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = {name: array[start:stop] for name, array in
+              _shared_arrays(shm.buf, n_envs, n_players).items()}
+    env = CribbageVectorEnv(stop - start, n_players=n_players, seed=seed)
+
+    try:
+        while True:
+            command, data = remote.recv()
+
+            if command == "step":
+                try:
+                    state, rewards, dones, _ = env.step(arrays["actions"])
+                except Exception as e:
+                    remote.send(e)
+                    continue
+                _write_state(arrays, state)
+                arrays["rewards"][:] = rewards
+                arrays["dones"][:] = dones
+
+            elif command == "reset":
+                state, _ = env.reset(dealer=data)
+                _write_state(arrays, state)
+                arrays["rewards"][:] = 0
+                arrays["dones"][:] = False
+
+            elif command == "close":
+                break
+
+            remote.send(None)
+
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Release the views before closing the block.
+        arrays = env = None
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+class AsyncCribbageVectorEnv(object):
+    """
+    Plays `n_envs` games of Cribbage split across `n_workers` processes.
+    Each worker steps its shard with CribbageVectorEnv and writes the
+    results in shared memory.
+
+    The arrays returned by reset() and step_wait() are views of the shared
+    buffers: they are overwritten by the next step and must be copied to be
+    kept.
+    """
+
+    def __init__(self, n_envs, n_workers=None, n_players=2, seed=None,
+                 context=None):
+        super(AsyncCribbageVectorEnv, self).__init__()
+
+        if n_workers is None:
+            n_workers = mp.cpu_count()
+        n_workers = min(n_workers, n_envs)
+
+        self.n_envs = n_envs
+        self.n_workers = n_workers
+        self.n_players = n_players
+
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=_buffer_size(n_envs, n_players))
+        self._arrays = _shared_arrays(self._shm.buf, n_envs, n_players)
+
+        # Every worker gets a contiguous shard of games and its own seed.
+        bounds = np.linspace(0, n_envs, n_workers + 1).astype(int)
+        seeds = np.random.SeedSequence(seed).spawn(n_workers)
+
+        ctx = mp.get_context(context)
+        self._remotes, self._processes = [], []
+        for i in range(n_workers):
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(worker_remote, remote, self._shm.name, n_envs,
+                      n_players, bounds[i], bounds[i + 1], seeds[i]),
+                daemon=True
+            )
+            process.start()
+            worker_remote.close()
+            self._remotes.append(remote)
+            self._processes.append(process)
+
+        self._waiting = False
+        self.closed = False
+
+    @property
+    def action_mask(self):
+        """Boolean mask (n_envs, 52) of the cards each player can play."""
+        return self._arrays["action_mask"]
+
+    def reset(self, dealer=None):
+        """Starts a new game in every environment."""
+        for remote in self._remotes:
+            remote.send(("reset", dealer))
+        self._wait()
+
+        state = self._get_state()
+        return(state, state.hand_id)
+
+    def step_async(self, actions):
+        """Sends one card id per game to the workers."""
+        if self._waiting:
+            raise Exception("Call step_wait() before stepping again.")
+
+        self._arrays["actions"][:] = actions
+        for remote in self._remotes:
+            remote.send(("step", None))
+        self._waiting = True
+
+    def step_wait(self):
+        """
+        Waits for the workers to finish stepping.
+
+        Returns
+        =======
+            state, rewards, dones, players: see CribbageVectorEnv.step
+        """
+        if not self._waiting:
+            raise Exception("Call step_async() before step_wait().")
+
+        self._waiting = False
+        self._wait()
+
+        state = self._get_state()
+        return(state, self._arrays["rewards"], self._arrays["dones"],
+               state.hand_id)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+
+        if self._waiting:
+            self._wait(raise_errors=False)
+        for remote in self._remotes:
+            try:
+                remote.send(("close", None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self._processes:
+            process.join()
+        for remote in self._remotes:
+            remote.close()
+
+        self._arrays = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views of the buffers are still held by the caller.
+            pass
+        self._shm.unlink()
+        self.closed = True
+
+    def _wait(self, raise_errors=True):
+        errors = [remote.recv() for remote in self._remotes]
+        errors = [e for e in errors if e is not None]
+        if errors and raise_errors:
+            raise errors[0]
+
+    def _get_state(self):
+        arrays = self._arrays
+        return VectorState(
+            arrays["hand"],
+            arrays["hand_id"],
+            arrays["reward_id"],
+            arrays["phase"],
+            arrays["player_score"],
+            arrays["opponent_score"]
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
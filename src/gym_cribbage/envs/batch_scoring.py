@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized scoring of many hands at once. Hands are NumPy arrays of card ids
+(see core.py) and the results match core.evaluate_cards exactly.
+"""
+
+from functools import lru_cache
+from itertools import combinations
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.tables import RANK_BASE, get_table
+
+RANK_OF = np.array(core.RANK_OF, dtype=np.int64)
+SUIT_OF = np.array(core.SUIT_OF, dtype=np.int64)
+VALUE_OF = np.array(core.VALUE_OF, dtype=np.int64)
+
+
+@lru_cache(maxsize=None)
+def subset_masks(n_cards):
+    """
+    Boolean masks (n_subsets, n_cards) of every subset of at least 2 of
+    `n_cards` cards, with the size of each subset.
+    """
+    subsets = [s for length in range(2, n_cards + 1)
+               for s in combinations(range(n_cards), length)]
+
+    masks = np.zeros((len(subsets), n_cards), dtype=bool)
+    for i, subset in enumerate(subsets):
+        masks[i, list(subset)] = True
+
+    return masks, masks.sum(axis=1)
+
+
+# Number of hands scored at once, bounds the size of temporary arrays.
+CHUNK_SIZE = 1 << 16
+
+
+def evaluate_cards_batch(hands, starters=None, is_crib=False):
+    """
+    Scores N hands during The Show.
+
+    Params
+    ======
+        hands: int array (N, n_cards)
+            Card ids of each hand.
+        starters: int array (N,) or None
+            Card id of the starter of each hand.
+        is_crib: bool or bool array (N,)
+            Whether each hand is a crib.
+
+    Returns
+    =======
+        points: int array (N,)
+    """
+    hands = np.asarray(hands, dtype=np.int64)
+    if starters is not None:
+        starters = np.asarray(starters, dtype=np.int64)
+    is_crib = np.broadcast_to(is_crib, hands.shape[:1])
+
+    if len(hands) <= CHUNK_SIZE:
+        return _evaluate_chunk(hands, starters, is_crib)
+
+    points = np.empty(len(hands), dtype=np.int64)
+    for i in range(0, len(hands), CHUNK_SIZE):
+        chunk = slice(i, i + CHUNK_SIZE)
+        points[chunk] = _evaluate_chunk(
+            hands[chunk],
+            None if starters is None else starters[chunk],
+            is_crib[chunk]
+        )
+    return points
+
+
+def _evaluate_chunk(hands, starters, is_crib):
+    n_hands, n_hand_cards = hands.shape
+
+    # If only one card on the table.
+    if n_hand_cards == 1:
+        return np.zeros(n_hands, dtype=np.int64)
+
+    if starters is None:
+        cards = hands
+    else:
+        cards = np.concatenate([hands, starters[:, None]], axis=1)
+
+    ranks = RANK_OF[cards]
+    masks, sizes = subset_masks(cards.shape[1])
+
+    # 15s: every subset whose values add up to 15.
+    sums = VALUE_OF[cards] @ masks.T
+    points = 2 * (sums == 15).sum(axis=1)
+
+    # Pairs: subsets of two cards of the same rank.
+    pairs = masks[sizes == 2]
+    left, right = np.nonzero(pairs)[1].reshape(-1, 2).T
+    same_rank = ranks[:, left] == ranks[:, right]
+    points += 2 * same_rank.sum(axis=1)
+
+    # Runs: subsets of at least 3 cards without pairs whose rank bits are
+    # contiguous. Without pairs, summing the rank bits is the same as OR-ing
+    # them. Only the longest runs count.
+    runs = sizes >= 3
+    pair_in_subset = (pairs.astype(np.int64) @ masks[runs].T) == 2
+    has_pair = (same_rank.astype(np.int64) @ pair_in_subset) > 0
+    rank_masks = np.left_shift(1, ranks) @ masks[runs].T
+    low = rank_masks & -rank_masks
+    is_run = ~has_pair & ((rank_masks + low) & rank_masks == 0)
+    run_sizes = sizes[runs]
+
+    found = np.zeros(n_hands, dtype=bool)
+    for length in range(cards.shape[1], 2, -1):
+        n_runs = is_run[:, run_sizes == length].sum(axis=1)
+        points += np.where(found, 0, n_runs * length)
+        found |= n_runs > 0
+
+    points += same_suit_points_batch(hands, starters, is_crib)
+    if starters is not None:
+        points += nobs_points_batch(hands, starters)
+
+    return points
+
+
+def same_suit_points_batch(hands, starters=None, is_crib=False):
+    """Flush points of N hands, see core.same_suit_points."""
+    suits = SUIT_OF[hands]
+    n_hand_cards = hands.shape[1]
+    hand_flush = (suits == suits[:, :1]).all(axis=1)
+
+    if starters is None:
+        return np.where(hand_flush, n_hand_cards, 0)
+
+    starter_suited = SUIT_OF[starters] == suits[:, 0]
+    crib_points = np.where(hand_flush & starter_suited, n_hand_cards + 1, 0)
+    hand_points = np.where(hand_flush, n_hand_cards + starter_suited, 0)
+
+    return np.where(is_crib, crib_points, hand_points)
+
+
+def nobs_points_batch(hands, starters):
+    """His nobs of N hands: a point for a jack of the starter's suit."""
+    nobs = (RANK_OF[hands] == core.JACK) & \
+        (SUIT_OF[hands] == SUIT_OF[starters][:, None])
+    return nobs.sum(axis=1)
+
+
+def show_rank_points_batch(ranks):
+    """
+    Points from fifteens, pairs and runs of (N, n_cards) rank indices, with
+    n_cards at most 5, read from the show table (see tables.show_key).
+    """
+    keys = np.zeros(len(ranks), dtype=np.int64)
+    for column in np.sort(ranks, axis=1).T:
+        keys = keys * RANK_BASE + column
+    return get_table("show")[keys].astype(np.int64)
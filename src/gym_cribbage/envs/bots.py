@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Baseline policies for simulate() and Tournament. Bots are callables taking a
+Turn (see simulate.py) and returning a card id. They work on card ids and
+lookup tables only, and are picklable so they can be sent to worker
+processes.
+
+    RandomBot: plays and discards uniformly random cards.
+    GreedyBot: keeps the 4 cards scoring the most points without a starter,
+        and plays the card scoring the most points minus the expected points
+        of the opponent's answer, which steers away from leaving 5 or 21 on
+        the table.
+    EVBot: discards to maximize the expected points of the hand and crib,
+        the latter from the crib tables (see discard.py), and plays like
+        GreedyBot.
+"""
+
+from itertools import combinations
+import random
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.core import MAX_TABLE_VALUE
+from gym_cribbage.envs.discard import discard_ev
+from gym_cribbage.envs.pegging import pegging_transitions
+from gym_cribbage.envs.tables import (
+    N_RANKS,
+    PEGGING_INVALID,
+    PEGGING_POINT_BITS,
+    PEGGING_POINT_MASK,
+    rank_value,
+)
+
+
+class RandomBot(object):
+    """Plays and discards uniformly random cards."""
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def __call__(self, turn):
+        return self.random.choice(turn.playable)
+
+
+class GreedyBot(object):
+    """
+    Discards to keep the best 4 cards without a starter, and plays the card
+    with the best points minus the expected points of the answer.
+    """
+
+    def __call__(self, turn):
+        if turn.phase == 0:
+            return self.discard(turn)
+        return self.play(turn)
+
+    def discard(self, turn):
+        hand = turn.hand
+        best = max(combinations(hand, 4), key=core.evaluate_cards)
+        return next(c for c in hand if c not in best)
+
+    def play(self, turn):
+        playable = turn.playable
+        if len(playable) == 1:
+            return playable[0]
+
+        transitions = pegging_transitions()
+        state = 0
+        for card in turn.table:
+            state = transitions[state][core.RANK_OF[card]]
+            if state == PEGGING_INVALID:
+                return playable[0]
+            state >>= PEGGING_POINT_BITS
+        total = turn.table_value
+
+        # Cards of each rank the opponents may hold.
+        unseen = [0] + [core.N_SUITS] * N_RANKS
+        for card in turn.hand:
+            unseen[core.RANK_OF[card]] -= 1
+        for card in turn.table:
+            unseen[core.RANK_OF[card]] -= 1
+        n_unseen = float(sum(unseen))
+
+        best, best_score = None, None
+        for card in playable:
+            rank = core.RANK_OF[card]
+            points, next_state, next_total = _peg(transitions, state, total,
+                                                  rank)
+
+            # Expected points of an answer by a random unseen card.
+            risk = 0
+            if next_total < MAX_TABLE_VALUE:
+                limit = MAX_TABLE_VALUE - next_total
+                for answer in range(1, N_RANKS + 1):
+                    if unseen[answer] and rank_value(answer) <= limit:
+                        risk += unseen[answer] * _peg(
+                            transitions, next_state, next_total, answer)[0]
+                risk /= n_unseen
+
+            # Ties go to the highest card, keeping low cards for later.
+            score = (points - risk, core.VALUE_OF[card])
+            if best_score is None or score > best_score:
+                best, best_score = card, score
+
+        return best
+
+
+class EVBot(GreedyBot):
+    """
+    Discards to maximize the expected points of the hand and the crib, and
+    plays like GreedyBot.
+    """
+
+    def __init__(self):
+        # With 2 players, cards are discarded one at a time: the second
+        # card of the best discard, by player, with the hand it is for.
+        self._second = {}
+
+    def discard(self, turn):
+        hand = sorted(turn.hand)
+        second = self._second.pop(turn.player, None)
+        if second is not None and second[0] == hand:
+            return second[1]
+
+        ev = discard_ev(hand, turn.player == turn.dealer, turn.n_players,
+                        crib_table=True)
+        first, rest = ev.best[0], ev.best[1:]
+        if rest:
+            self._second[turn.player] = (
+                [c for c in hand if c != first], rest[0])
+        return first
+
+
+def _peg(transitions, state, total, rank):
+    """
+    Points of playing a card of `rank` on a count, with 2 for reaching 31,
+    and the next state and total.
+    """
+    entry = transitions[state][rank]
+    total += rank_value(rank)
+    points = entry & PEGGING_POINT_MASK
+    if total == 15 or total == MAX_TABLE_VALUE:
+        points += 2
+    return points, entry >> PEGGING_POINT_BITS, total
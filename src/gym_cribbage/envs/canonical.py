@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Canonical forms of cards under the permutations of the suits.
+
+Suits only score through flushes and nobs, which are unchanged when the suits
+of every card involved are permuted together. Cards that are the same up to
+such a permutation share a canonical form, on which caches and tables can be
+keyed: a hand has up to 24 forms, each stored once.
+
+The suits are relabeled in decreasing order of their signatures, the rank
+masks of the cards of the suit in each group. Suits with the same signature
+are interchangeable, so the result does not depend on their order.
+"""
+
+from numbers import Integral
+
+from gym_cribbage.envs import core
+
+
+def permute_suits(card, permutation):
+    """The card id `card` with its suit moved to permutation[suit]."""
+    return permutation[core.SUIT_OF[card]] * core.N_RANKS + \
+        core.RANK_OF[card] - 1
+
+
+def invert_permutation(permutation):
+    """The permutation of the suits undoing `permutation`."""
+    inverse = [0] * core.N_SUITS
+    for suit, new_suit in enumerate(permutation):
+        inverse[new_suit] = suit
+    return tuple(inverse)
+
+
+def canonical_permutation(*groups):
+    """
+    The permutation of the suits, permutation[suit] being the new suit, that
+    maps groups of card ids to their canonical form. See canonicalize().
+    """
+    signatures = [[0] * len(groups) for _ in range(core.N_SUITS)]
+    for i, group in enumerate(groups):
+        if group is None:
+            continue
+        if isinstance(group, Integral):
+            group = (group,)
+        for card in group:
+            signatures[core.SUIT_OF[card]][i] |= 1 << core.RANK_OF[card]
+
+    order = sorted(range(core.N_SUITS), key=signatures.__getitem__,
+                   reverse=True)
+    return invert_permutation(order)
+
+
+def canonicalize(*groups):
+    """
+    Canonical form of groups of cards whose suits are permuted together, for
+    example a hand, a starter and a crib.
+
+    Params
+    ======
+        groups: lists of card ids, single card ids or None
+
+    Returns
+    =======
+        canonical, permutation: tuple, tuple
+            The groups with their suits permuted, lists as sorted tuples
+            (single card ids and None are kept as such), and the
+            permutation, permutation[suit] being the new suit.
+    """
+    permutation = canonical_permutation(*groups)
+
+    canonical = []
+    for group in groups:
+        if group is None:
+            canonical.append(None)
+        elif isinstance(group, Integral):
+            canonical.append(permute_suits(group, permutation))
+        else:
+            canonical.append(tuple(sorted(
+                permute_suits(c, permutation) for c in group)))
+
+    return tuple(canonical), permutation
+
+
+def suit_canonical(cards):
+    """
+    The canonical sorted tuple of the card ids `cards`, and the permutation
+    leading to it.
+    """
+    (canonical,), permutation = canonicalize(cards)
+    return canonical, permutation
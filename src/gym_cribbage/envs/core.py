@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Integer representation of cards and hands.
+
+A card is an int in 0..51: `suit * 13 + rank - 1`, with rank indices starting
+at 1 (Ace) and suit indices at 0. This is the same index as the one-hot
+encoding of Card.state. A hand is a 64-bit bitmask (bit `c` is set when card
+`c` is held) plus a small list of card ids that keeps the order of play.
+
+The scoring kernels below work on card ids only and never allocate Card or
+Stack objects.
+"""
+
+from gym_cribbage.envs.tables import (
+    MAX_TABLE_VALUE,
+    PAIR_POINTS,
+    rank_value,
+    show_rank_points,
+)
+
+N_RANKS = 13
+N_SUITS = 4
+N_CARDS = N_RANKS * N_SUITS
+
+JACK = 11
+
+# Actions are card ids, plus a no-op for The Show.
+ACTION_NOOP = N_CARDS
+N_ACTIONS = N_CARDS + 1
+
+# Cards dealt to each player, by number of players.
+CARDS_PER_HAND = {2: 6, 3: 5, 4: 5}
+
+# Per card lookups.
+RANK_OF = tuple(c % N_RANKS + 1 for c in range(N_CARDS))
+SUIT_OF = tuple(c // N_RANKS for c in range(N_CARDS))
+VALUE_OF = tuple(rank_value(r) for r in RANK_OF)
+BIT_OF = tuple(1 << c for c in range(N_CARDS))
+
+
+def card_id(rank, suit):
+    """Card id of a rank index (1..13) and a suit index (0..3)."""
+    return suit * N_RANKS + rank - 1
+
+
+def mask_of(cards):
+    """Bitmask of a sequence of card ids."""
+    mask = 0
+    for c in cards:
+        mask |= BIT_OF[c]
+    return mask
+
+
+def ids_of(mask):
+    """Card ids held in a bitmask, in increasing order."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def is_run_mask(rank_mask):
+    """True if the set bits of a rank bitmask are contiguous."""
+    low = rank_mask & -rank_mask
+    return (rank_mask + low) & rank_mask == 0
+
+
+def table_value(cards):
+    return sum(VALUE_OF[c] for c in cards)
+
+
+def playable(cards, total):
+    """Card ids that can be played on a table worth `total`."""
+    limit = MAX_TABLE_VALUE - total
+    return [c for c in cards if VALUE_OF[c] <= limit]
+
+
+def is_sequence(cards):
+    # Need at least 3 cards
+    if len(cards) < 3:
+        return False
+
+    rank_mask = 0
+    for c in cards:
+        bit = 1 << RANK_OF[c]
+        if rank_mask & bit:
+            return False
+        rank_mask |= bit
+    return is_run_mask(rank_mask)
+
+
+def evaluate_table(cards):
+    """
+    Points earned by the last card of `cards`, the card ids on the table
+    during The Play.
+    """
+    points = 0
+
+    if table_value(cards) == 15:
+        points += 2
+
+    # Pair points: count the cards of the same rank at the end of the table.
+    last = RANK_OF[cards[-1]]
+    n_same = 1
+    for i in range(len(cards) - 2, max(len(cards) - 5, -1), -1):
+        if RANK_OF[cards[i]] != last:
+            break
+        n_same += 1
+    points += PAIR_POINTS[n_same]
+
+    # Run points: walk back from the last card until a rank repeats and keep
+    # the longest run found.
+    run = 0
+    rank_mask = 0
+    for n_cards, i in enumerate(range(len(cards) - 1, -1, -1), 1):
+        bit = 1 << RANK_OF[cards[i]]
+        if rank_mask & bit:
+            break
+        rank_mask |= bit
+        if n_cards >= 3 and is_run_mask(rank_mask):
+            run = n_cards
+    points += run
+
+    return points
+
+
+def same_suit_points(hand, knob=None, is_crib=False):
+    """
+    Flush points of the card ids in `hand`. A crib needs the knob to be of
+    the same suit too, a regular hand gets an extra point if it is.
+    """
+    suits = set(SUIT_OF[c] for c in hand)
+
+    if is_crib:
+        n_cards = len(hand)
+        if knob is not None:
+            suits.add(SUIT_OF[knob])
+            n_cards += 1
+        return n_cards if len(suits) == 1 else 0
+
+    if len(suits) != 1:
+        return 0
+    if knob is not None and SUIT_OF[knob] in suits:
+        return len(hand) + 1
+    return len(hand)
+
+
+def evaluate_cards(hand, starter=None, is_crib=False):
+    """Points of the card ids in `hand` during The Show."""
+    # If only one card on the table.
+    if len(hand) == 1:
+        return 0
+
+    ranks = [RANK_OF[c] for c in hand]
+    if starter is not None:
+        ranks.append(RANK_OF[starter])
+
+    points = show_rank_points(ranks)
+    points += same_suit_points(hand, starter, is_crib)
+
+    # His nobs: the jack of the starter's suit.
+    if starter is not None:
+        points += hand.count(card_id(JACK, SUIT_OF[starter]))
+
+    return points
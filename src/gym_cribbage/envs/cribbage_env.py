@@ -4,13 +4,22 @@
 # @Last Modified by:   Joseph D Viviano
 # @Last Modified time: 2019-03-22 19:51:20
 
+from collections import namedtuple
 from copy import copy
-from itertools import product, combinations
+from itertools import product
 import gym
 import logging
 import numpy as np
-import random
-from collections import defaultdict
+
+from gym_cribbage.envs import core, trace
+from gym_cribbage.envs.batch_scoring import RANK_OF, SUIT_OF
+from gym_cribbage.envs.core import ACTION_NOOP, MAX_TABLE_VALUE, N_ACTIONS
+from gym_cribbage.envs.observation import (
+    OBS_SIZE,
+    encode_observation,
+    observation_space,
+)
+from gym_cribbage.envs.pegging import PeggingState
 
 SUITS = "♤♡♧♢"
 RANKS = ["A", 2, 3, 4, 5, 6, 7, 8, 9, 10, "J", "Q", "K"]
@@ -19,6 +28,12 @@ RANKS = ["A", 2, 3, 4, 5, 6, 7, 8, 9, 10, "J", "Q", "K"]
 RANK_TO_IDX = {r: i for i, r in enumerate(RANKS, 1)}
 SUIT_TO_IDX = {s: i for i, s in enumerate(SUITS, 1)}
 
+# Card id (see core.py) of every valid (rank, suit).
+CARD_TO_IDX = {
+    (r, s): core.card_id(RANK_TO_IDX[r], SUIT_TO_IDX[s] - 1)
+    for r, s in product(RANKS, SUITS)
+}
+
 # Render: Used to render player-specific stats.
 TABLE_MP = """--- Player1 Player2 Player3 Player4
 Hand {hand1} {hand2} {hand3} {hand4}
@@ -33,60 +48,83 @@ Table {table}
 Discarded {discarded}"""
 ROW = "{:12s} {:60s}"
 
-MAX_TABLE_VALUE = 31  # Max points allowed before hand reset.
 MAX_ROUND_VALUE = 121  # Max points allowed before game ends.
 
-# For debug information.
-logging.basicConfig(
-    level=logging.WARN, format="[%(lineno)s: %(funcName)24s] %(message)s")
+# Compact, immutable copy of a CribbageEnv. Stacks of cards are stored as
+# bytes of card ids, see CribbageEnv.snapshot().
+Snapshot = namedtuple("Snapshot", [
+    "scores", "dealer", "player", "last_player", "phase", "prev_phase",
+    "new_hand", "initialized", "reward_id", "hands", "played", "table",
+    "crib", "starter", "discarded", "deck", "cursor", "rng_state"
+])
 
 
 class Card(object):
-    """Card, french style"""
+    """
+    Card, french style. The 52 cards are interned: Card(rank, suit) always
+    returns the same immutable object, with its id, value and hash computed
+    once. Cards with another rank or suit (dummy cards) are new objects
+    every time, with None as id. Cards do not belong to a player, `player`
+    is ignored and kept for compatibility.
+    """
 
-    def __init__(self, rank, suit, player=None):
-        super(Card, self).__init__()
-        self.rank = rank
-        self.suit = suit
-        self.player = player
+    __slots__ = ("rank", "suit", "idx", "value", "rank_value", "_hash")
 
-    @property
-    def value(self):
-        if isinstance(self.rank, str):
-            if self.rank == "A":
-                return 1
-            if self.rank in "JQK":
-                return 10
-        return self.rank
+    _interned = {}
 
-    @property
-    def rank_value(self):
-        if self.rank == "A":
-            return 1
-        elif self.rank == 'J':
-            return 11
-        elif self.rank == 'Q':
-            return 12
-        elif self.rank == 'K':
-            return 13
-
-        return self.rank
+    def __new__(cls, rank, suit, player=None):
+        card = cls._interned.get((rank, suit))
+        if card is not None:
+            return card
+
+        card = super(Card, cls).__new__(cls)
+        idx = CARD_TO_IDX.get((rank, suit))
+        for name, value in [
+                ("rank", rank),
+                ("suit", suit),
+                # Integer id of the card, None for dummy cards.
+                ("idx", idx),
+                ("value", rank if idx is None else core.VALUE_OF[idx]),
+                ("rank_value", rank if idx is None else core.RANK_OF[idx]),
+                ("_hash", hash((rank, suit)))]:
+            object.__setattr__(card, name, value)
+
+        if idx is not None:
+            cls._interned[(rank, suit)] = card
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Cards are immutable.")
+
+    def __reduce__(self):
+        # Unpickled and copied cards are the interned ones.
+        return (Card, (self.rank, self.suit))
+
+    @staticmethod
+    def from_idx(idx, player=None):
+        return CARDS[idx]
+
+    def _check_idx(self):
+        if self.idx is None:
+            raise ValueError(
+                "{} is not a card of the deck. Cannot encode it".format(self))
 
     @property
     def state(self):
         # One-hot encode the card
+        self._check_idx()
         s = np.zeros(52)
-        idx = SUITS.index(self.suit) * 13 + RANKS.index(self.rank)
-        s[idx] = 1
+        s[self.idx] = 1
         return s
 
     @property
     def compact_state(self):
         # [0:3] encode suit, [4:16] encode rank
+        self._check_idx()
         suit = np.zeros(4)
         rank = np.zeros(13)
-        suit[SUITS.index(self.suit)] = 1
-        rank[RANKS.index(self.rank)] = 1
+        suit[core.SUIT_OF[self.idx]] = 1
+        rank[core.RANK_OF[self.idx] - 1] = 1
         return suit, rank
 
     @staticmethod
@@ -102,8 +140,13 @@ class Card(object):
         return "{}{}".format(self.rank, self.suit)
 
     def __eq__(self, card):
+        if self is card:
+            return True
         return self.rank == card.rank and self.suit == card.suit
 
+    def __hash__(self):
+        return self._hash
+
     def __ge__(self, card):
         return self.rank_value >= card.rank_value
 
@@ -117,62 +160,137 @@ class Card(object):
         return self.rank_value < card.rank_value
 
 
+# The interned cards, by id.
+CARDS = tuple(Card(*rank_suit) for rank_suit in
+              sorted(CARD_TO_IDX, key=CARD_TO_IDX.get))
+
+
 class Deck(object):
-    """Deck of 52 cards. Automatically suffles at creation."""
+    """
+    Deck of 52 cards. Automatically suffles at creation. The deck is a
+    permutation of the card ids and a cursor on the next card to deal, so it
+    can be shuffled again and reused for every hand.
+    """
 
-    def __init__(self):
+    def __init__(self, rng=None):
         super(Deck, self).__init__()
-        self.cards = [Card(rank, suit) for rank, suit in product(RANKS, SUITS)]
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.order = np.arange(core.N_CARDS)
+
+        self.shuffle()
 
-        random.shuffle(self.cards)
+    def shuffle(self):
+        """Puts every card back in the deck and shuffles it."""
+        self.rng.shuffle(self.order)
+        self.cursor = 0
+
+    @property
+    def cards(self):
+        """The cards left in the deck, in the order they will be dealt."""
+        return [Card.from_idx(idx) for idx in self.order[self.cursor:]]
+
+    @cards.setter
+    def cards(self, cards):
+        # Cards that are not in the deck are kept before the cursor.
+        cards = np.array([c.idx for c in cards], dtype=np.int64)
+        dealt = np.setdiff1d(np.arange(core.N_CARDS), cards)
+        self.order = np.concatenate([dealt, cards])
+        self.cursor = len(dealt)
 
     def deal(self, player=None):
         """
-        Deals a card. Optionally tell what player is getting this card
+        Deals a card. `player` is only kept for compatibility: cards no longer
+        record who holds them, see CribbageEnv.dealt_to().
         """
-        try:
-            card = self.cards.pop(0)
-            card.player = player
-            return card
-        except IndexError:
+        if self.cursor >= len(self.order):
             return None
 
+        card = CARDS[self.order[self.cursor]]
+        self.cursor += 1
+        return card
+
     def remove(self, card):
-        new_cards = []
-        for c in self.cards:
-            if c != card:
-                new_cards.append(c)
-        new_deck = Deck()
-        new_deck.cards = new_cards
+        new_deck = Deck.__new__(Deck)
+        new_deck.rng = self.rng
+        new_deck.order = self.order.copy()
+        new_deck.cursor = self.cursor
+        new_deck.remove_(card)
         return new_deck
 
     def remove_(self, card):
-        for i, c in enumerate(self.cards):
-            if c == card:
-                self.cards.pop(i)
+        """
+        Removes a card from the deck by moving it just before the cursor,
+        keeping the order of the other cards.
+        """
+        remaining = self.order[self.cursor:]
+        positions = np.flatnonzero(remaining == card.idx)
+        if len(positions) == 0:
+            return
+
+        i = positions[0]
+        remaining[1:i + 1] = remaining[:i].copy()
+        remaining[0] = card.idx
+        self.cursor += 1
 
     def __len__(self):
-        return len(self.cards)
+        return len(self.order) - self.cursor
 
 
 class Stack(object):
-    """A generic stack of cards."""
+    """
+    A generic stack of cards. The cards are kept in order in a tuple, shared
+    by the copies of the stack, next to the bitmask of their ids (see
+    core.py), which answers membership in O(1). A stack may hold the same
+    card more than once, in which case the mask has fewer bits than the
+    stack has cards.
+    """
 
     @staticmethod
     def from_stack(stack):
-        return Stack(cards=stack.cards.copy())
+        new = Stack.__new__(Stack)
+        new._cards = stack._cards
+        new._mask = stack._mask
+        return new
+
+    @staticmethod
+    def from_ids(ids):
+        return Stack(cards=[CARDS[idx] for idx in ids])
 
     def __init__(self, cards=None):
         super(Stack, self).__init__()
-        if cards is None:
-            self.cards = []
-        else:
-            self.cards = cards
+        self.cards = [] if cards is None else cards
+
+    @property
+    def cards(self):
+        """
+        The cards, in order, as a tuple: mutate the stack with add_(),
+        play() or by assigning cards.
+        """
+        return self._cards
+
+    @cards.setter
+    def cards(self, cards):
+        self._cards = tuple(cards)
+        self._mask = 0
+        for card in self._cards:
+            if card.idx is not None:
+                self._mask |= core.BIT_OF[card.idx]
+
+    def _has_duplicates(self):
+        return core.popcount(self._mask) != len(self._cards)
 
     def play(self, card):
-        for i, c in enumerate(self.cards):
+        if card.idx is not None and not self._mask & core.BIT_OF[card.idx]:
+            raise ValueError("{} not in hand. Cannot play this".format(card))
+
+        for i, c in enumerate(self._cards):
             if card == c:
-                return self.cards.pop(i)
+                duplicates = self._has_duplicates()
+                self._cards = self._cards[:i] + self._cards[i + 1:]
+                if card.idx is not None and \
+                        (not duplicates or card not in self._cards):
+                    self._mask &= ~core.BIT_OF[card.idx]
+                return c
         raise ValueError("{} not in hand. Cannot play this".format(card))
 
     def discard(self, card):
@@ -181,69 +299,85 @@ class Stack(object):
         """
         self.play(card)
 
+    @property
+    def ids(self):
+        """The integer ids of the cards, in order."""
+        return [c.idx for c in self._cards]
+
+    @property
+    def mask(self):
+        """The bitmask of the cards."""
+        return self._mask
+
     @property
     def state(self):
         # One-hot encode the hand
-        s = np.zeros(52)
-        for card in self.cards:
-            s += card.state
-        return s
+        return np.bincount(self.ids, minlength=core.N_CARDS).astype(
+            np.float64)
 
     @property
     def compact_state(self):
         """
         Possibly for state aggregation.
         """
-        # [0:3] encode suit, [4:16] encode rank
-        suit = np.zeros((4, len(self)), dtype=np.float32)
-        rank = np.zeros((13, len(self)), dtype=np.float32)
-        for i, card in enumerate(self.cards):
-            s, r = card.compact_state
-            suit[:, i] = s
-            rank[:, i] = r
-
-        argsort = np.argsort([c.rank_value for c in self])
-        suit = suit[:, argsort]
-        rank = rank[:, argsort]
+        # [0:3] encode suit, [4:16] encode rank, sorted by rank.
+        ids = np.array(self.ids, dtype=np.int64)
+        ids = ids[np.argsort(RANK_OF[ids])]
+        columns = np.arange(len(ids))
+
+        suit = np.zeros((4, len(ids)), dtype=np.float32)
+        rank = np.zeros((13, len(ids)), dtype=np.float32)
+        suit[SUIT_OF[ids], columns] = 1
+        rank[RANK_OF[ids] - 1, columns] = 1
         return suit, rank
 
     def add(self, card):
-        if not isinstance(card, Card):
-            raise ValueError("Can only add card to a hand.")
-        return Stack(cards=self.cards + [card])
+        new = Stack.from_stack(self)
+        new.add_(card)
+        return new
 
     def add_(self, card):
         if not isinstance(card, Card):
             raise ValueError("Can only add card to a hand.")
-        self.cards.append(card)
+        self._cards += (card,)
+        if card.idx is not None:
+            self._mask |= core.BIT_OF[card.idx]
 
     def remove(self, card):
-        if not isinstance(card, Card):
-            raise ValueError("Can only add card to a hand.")
-        return Stack(cards=[c for c in self.cards if c != card])
+        new = Stack.from_stack(self)
+        new.remove_(card)
+        return new
 
     def remove_(self, card):
         if not isinstance(card, Card):
             raise ValueError("Can only add card to a hand.")
-        self.cards = [c for c in self.cards if c != card]
+        if card.idx is not None and not self._mask & core.BIT_OF[card.idx]:
+            return
+        self.cards = [c for c in self._cards if c != card]
+
+    def __contains__(self, card):
+        if card.idx is not None:
+            return bool(self._mask & core.BIT_OF[card.idx])
+        return any(card == c for c in self._cards)
 
     def __repr__(self):
-        if len(self.cards) == 0:
+        if len(self._cards) == 0:
             return("empty")
         else:
-            return("-".join([str(c) for c in self.cards]))
+            return("-".join([str(c) for c in self._cards]))
 
     def __iter__(self):
-        for card in self.cards:
-            yield card
+        return iter(self._cards)
 
     def __len__(self):
-        return len(self.cards)
+        return len(self._cards)
 
     def __getitem__(self, idx):
         if not isinstance(idx, (int, slice)):
             raise ValueError("Index must be integer or slice")
-        return self.cards[idx]
+        if isinstance(idx, slice):
+            return list(self._cards[idx])
+        return self._cards[idx]
 
 
 class State(object):
@@ -274,30 +408,81 @@ class CribbageEnv(gym.Env):
     of point following the last card played. TODO: The
     """
 
-    def __init__(self, n_players=2, verbose=False):
+    def __init__(self, n_players=2, verbose=False, seed=None,
+                 obs_mode="object", reward_mode="points"):
         super(CribbageEnv, self).__init__()
 
         self.n_players = n_players
         if self.n_players < 2 or self.n_players > 4:
             raise ValueError("Cribbage is played by 2-4 players.")
 
-        if self.n_players == 2:
-            self._cards_per_hand = 6
-        else:
-            self._cards_per_hand = 5
+        self._cards_per_hand = core.CARDS_PER_HAND[self.n_players]
 
+        # Sink receiving the events of the game, see trace.py.
+        self._trace = None
         self.logger = logging.getLogger(__name__)
 
         if verbose:
             self.logger.setLevel(logging.DEBUG)
+            if not self.logger.handlers:
+                self.logger.addHandler(logging.StreamHandler())
+            self.set_trace(trace.LoggingSink(self.logger))
+
+        # "object": steps return State objects. "numeric": steps return the
+        # float32 vector described in observation.py, written in place into
+        # the same buffer at every step.
+        if obs_mode not in ("object", "numeric"):
+            raise ValueError("obs_mode must be 'object' or 'numeric'.")
+        self.obs_mode = obs_mode
+        self.observation_space = observation_space()
+        self._observation = np.zeros(OBS_SIZE, dtype=np.float32)
+
+        # Actions can be Card objects or card ids, ACTION_NOOP for The Show.
+        self.action_space = gym.spaces.Discrete(N_ACTIONS)
+        self._action_mask = np.zeros(N_ACTIONS, dtype=bool)
+
+        # "points": steps reward the points scored. "win_prob": steps reward
+        # the change in the probability of winning of the player who scored,
+        # from the table of winprob.py (2 players only).
+        if reward_mode not in ("points", "win_prob"):
+            raise ValueError("reward_mode must be 'points' or 'win_prob'.")
+        self.reward_mode = reward_mode
+        self._win_prob = None
+        if reward_mode == "win_prob":
+            if self.n_players != 2:
+                raise ValueError("Win probability rewards need 2 players.")
+            # Imported here: winprob plays hands with simulate.py, which
+            # imports this module.
+            from gym_cribbage.envs.winprob import win_prob_table
+            self._win_prob = win_prob_table()
+
+        self.seed(seed)
 
         self.initialized = False
 
-    def reset(self, dealer=None):
+    def seed(self, seed=None):
         """
-        Resets the hand, additionally clearing the scoreboard.
+        Seeds the random generator of this environment, used to shuffle the
+        deck and pick the dealer. Games are reproducible from a seed.
         """
-        self.logger.debug("New Game!")
+        self.rng = np.random.default_rng(seed)
+        self.deck = Deck(rng=self.rng)
+        return [seed]
+
+    def set_trace(self, sink):
+        """
+        Sends the events of the game to `sink`, a callable taking a
+        trace.Event, e.g. a trace.RingBuffer. None turns tracing off.
+        """
+        self._trace = sink
+
+    def reset(self, dealer=None, seed=None):
+        """
+        Resets the hand, additionally clearing the scoreboard. Optionally
+        seeds the environment first.
+        """
+        if seed is not None:
+            self.seed(seed)
 
         # Reset the persistant scores of all players.
         self.scores = np.zeros(self.n_players, dtype=np.uint8)
@@ -310,7 +495,7 @@ class CribbageEnv(gym.Env):
 
         self.initialized = True
 
-        return(self.state, reward, done, "Reset Game!")
+        return(self._get_observation(), reward, done, "Reset Game!")
 
     def step(self, card):
         """
@@ -320,28 +505,36 @@ class CribbageEnv(gym.Env):
 
         Params
         ======
-            card: Card
-                A card object
+            card: Card or int
+                A card object, or the id of the card (see action_space).
+                Ignored during The Show, where ACTION_NOOP can be passed.
 
         Returns
         =======
             (current play, past plays), points, total: (Stack, Stack), int, int
-            points is the reward for the last card played
+            points is the reward for the last card played (see reward_mode)
             total is the cummulative value of the card played in the current
             play.
         """
         if not self.initialized:
             raise Exception("Need to CribbageEnv.reset() before first step.")
 
+        if isinstance(card, (int, np.integer)) and self.phase < 2:
+            if not 0 <= card < ACTION_NOOP:
+                raise ValueError(
+                    "Action {} is not a card. Cannot play this".format(card))
+            card = Card.from_idx(int(card))
+
         done = False
         self.new_hand = False
         debug = "step!"
 
         # The Deal.
         if self.phase == 0:
-            self.logger.debug(
-                "Player {} discards {} to the crib".format(self.player, card)
-            )
+            if self._trace is not None:
+                self._trace(trace.Event(
+                    trace.DISCARD, self.player, card.idx, 0, 0))
+
             # Move card from hand to crib.
             self.hands[self.player].discard(card)
             self.crib.add_(card)
@@ -355,18 +548,18 @@ class CribbageEnv(gym.Env):
             if sum(counts) / float(self.n_players) == 4:
                 self.phase = 1
                 self.starter = [self.deck.deal()]
-                self.logger.debug("Starter drawn={}".format(self.starter))
 
+                # Two for his (the dealer's) heels.
                 if self.starter[0].rank == "J":
                     reward = 2
-                    self.logger.debug("Two for his (the dealer's) heels!")
+
+                if self._trace is not None:
+                    self._trace(trace.Event(
+                        trace.STARTER, self.dealer, self.starter[0].idx,
+                        reward, 0))
 
                 # Start next phase from the left of the dealer.
                 self.player = self.next_player(self.player, from_dealer=True)
-                # self.logger.debug("Crib: {}".format(self.crib))
-                self.logger.debug(
-                    f"Crib complete: {self.crib}  Move to The Play."
-                )
 
             else:
                 self.player = self.next_player(self.player)
@@ -387,17 +580,19 @@ class CribbageEnv(gym.Env):
 
         # The Play.
         elif self.phase == 1:
-            self.logger.debug(
-                "Player {} plays {}".format(self.player, card)
-            )
             # Move card from player's hand to table. Keep track of player's
             # played cards in "played", which we need for The Show.
             self.hands[self.player].discard(card)
             self.played[self.player].add_(card)
             self.table.add_(card)
-            reward = self._evaluate_play()
+            reward = self._evaluate_play(card)
             self._update_table_value()
 
+            if self._trace is not None:
+                self._trace(trace.Event(
+                    trace.PLAY, self.player, card.idx, reward,
+                    self.table_value))
+
             # Check to see who can play next.
             counts, playable_hands = self._count_playable_cards()
 
@@ -408,28 +603,23 @@ class CribbageEnv(gym.Env):
             if sum(counts) == 0:
 
                 # Reward player for placing the last card.
-                if self.table_value == MAX_TABLE_VALUE:
-                    reward += 2
-                    self.logger.debug("reward+2 for MAX_TABLE_VALUE.")
-                else:
-                    reward += 1
-                    self.logger.debug("reward+1 for last player.")
+                go = 2 if self.table_value == MAX_TABLE_VALUE else 1
+                reward += go
+
+                if self._trace is not None:
+                    self._trace(trace.Event(
+                        trace.GO, self.player, -1, go, self.table_value))
 
                 remaining_cards = self._count_remaining_cards()
 
                 # Move onto The Show.
                 if remaining_cards == 0:
-                    self.logger.debug("No cards left, time for The Show.")
                     self.phase = 2
                     self.player = self.next_player(self.player,
                                                    from_dealer=True)
 
                 # Reset the table and playable cards.
                 else:
-                    self.logger.debug(
-                        "Resetting table! table_value={} n_cards={}".format(
-                            self.table_value, remaining_cards)
-                    )
                     self._reset_table()
                     self.player = self.next_player(self.player)
                     counts, playable_hands = self._count_playable_cards()
@@ -484,10 +674,18 @@ class CribbageEnv(gym.Env):
 
             self.prev_phase = 2
 
+        if self._win_prob is not None:
+            reward = self._win_prob_reward(self.state.reward_id, reward)
+
         # If any player, at any time, gets a winning amount of points.
         if any(self.scores >= MAX_ROUND_VALUE):
             done = True
 
+            if self._trace is not None:
+                winner = int(np.argmax(self.scores))
+                self._trace(trace.Event(
+                    trace.GAME_OVER, winner, -1, 0, int(self.scores[winner])))
+
             # Forces user to reset the environment for the next game.
             self.new_hand = False
             self.initialized = False
@@ -499,7 +697,18 @@ class CribbageEnv(gym.Env):
             next_dealer = self.next_player(self.dealer)
             self._reset_hand(dealer=next_dealer, reward_id=self.state.reward_id)
 
-        return(self.state, reward, done, debug)
+        return(self._get_observation(), reward, done, debug)
+
+    def dealt_to(self, card):
+        """
+        The player a card (Card or id) was dealt to during this hand, None for
+        the starter and the cards left in the deck.
+        """
+        idx = card if isinstance(card, (int, np.integer)) else card.idx
+        position = int(np.flatnonzero(self.deck.order == idx)[0])
+        if position < self.n_players * self._cards_per_hand:
+            return position // self._cards_per_hand
+        return None
 
     def next_player(self, player, from_dealer=False):
         """
@@ -513,7 +722,6 @@ class CribbageEnv(gym.Env):
         if player > self.n_players - 1:
             player = 0
 
-        self.logger.debug("Player={}".format(self.player))
         return player
 
     def render(self, mode='human'):
@@ -544,6 +752,129 @@ class CribbageEnv(gym.Env):
     def close(self):
         pass
 
+    def snapshot(self, with_rng=False):
+        """
+        Returns a compact, immutable Snapshot of the game that restore() can
+        bring back, e.g. to branch a search. The state of the random
+        generator, which shuffles the next hands, is only saved if
+        `with_rng` is True.
+        """
+        if not hasattr(self, "state"):
+            raise Exception("Need to CribbageEnv.reset() before snapshot.")
+
+        rng_state = None
+        if with_rng:
+            state = self.rng.bit_generator.state
+            rng_state = (state["bit_generator"], state["state"]["state"],
+                         state["state"]["inc"], state["has_uint32"],
+                         state["uinteger"])
+
+        return Snapshot(
+            tuple(int(s) for s in self.scores),
+            self.dealer,
+            self.player,
+            self.last_player,
+            self.phase,
+            self.prev_phase,
+            self.new_hand,
+            self.initialized,
+            self.state.reward_id,
+            tuple(bytes(hand.ids) for hand in self.hands),
+            tuple(bytes(played.ids) for played in self.played),
+            bytes(self.table.ids),
+            bytes(self.crib.ids),
+            bytes(c.idx for c in self.starter),
+            bytes(self.discarded.ids),
+            self.deck.order.astype(np.uint8).tobytes(),
+            self.deck.cursor,
+            rng_state
+        )
+
+    def restore(self, snapshot):
+        """Puts the game back in the state saved by snapshot()."""
+        self.scores = np.array(snapshot.scores, dtype=np.uint8)
+        self.dealer = snapshot.dealer
+        self.player = snapshot.player
+        self.last_player = snapshot.last_player
+        self.phase = snapshot.phase
+        self.prev_phase = snapshot.prev_phase
+        self.new_hand = snapshot.new_hand
+        self.initialized = snapshot.initialized
+
+        self.hands = [Stack.from_ids(hand) for hand in snapshot.hands]
+        self.played = [Stack.from_ids(played) for played in snapshot.played]
+        self.table = Stack.from_ids(snapshot.table)
+        self.crib = Stack.from_ids(snapshot.crib)
+        self.starter = [Card.from_idx(c) for c in snapshot.starter] \
+            if snapshot.starter else Stack()
+        self.discarded = Stack.from_ids(snapshot.discarded)
+
+        self.deck.order[:] = np.frombuffer(snapshot.deck, dtype=np.uint8)
+        self.deck.cursor = snapshot.cursor
+
+        if snapshot.rng_state is not None:
+            name, state, inc, has_uint32, uinteger = snapshot.rng_state
+            self.rng.bit_generator.state = {
+                "bit_generator": name,
+                "state": {"state": state, "inc": inc},
+                "has_uint32": has_uint32,
+                "uinteger": uinteger
+            }
+
+        # The pegging state only depends on the cards on the table.
+        self.pegging = PeggingState()
+        for c in snapshot.table:
+            self.pegging.play(c)
+        self.table_value = self.pegging.total
+
+        # The state holds the playable cards of the current player.
+        if self.phase == 2:
+            hand = Stack([])
+        else:
+            hand = Stack(self._count_playable_cards()[1][self.player])
+        player_score, opponent_scores = self._get_scores()
+        self.state = State(
+            hand,
+            self.player,
+            snapshot.reward_id,
+            self.phase,
+            player_score,
+            opponent_scores
+        )
+
+    @property
+    def action_mask(self):
+        """
+        Boolean mask over action_space of the legal actions of the current
+        player: the cards they can play, or ACTION_NOOP during The Show. The
+        same array is rewritten at every call.
+        """
+        mask = self._action_mask
+        mask[:] = False
+        if self.phase == 2:
+            mask[ACTION_NOOP] = True
+        else:
+            mask[[c.idx for c in self.state.hand]] = True
+        return mask
+
+    def _win_prob_reward(self, player, points):
+        """
+        The change in the probability of winning of `player` after scoring
+        `points`, seen from the start of the current hand.
+        """
+        score = int(self.scores[player])
+        opponent_score = int(self.scores[1 - player])
+        win_prob = self._win_prob[int(player == self.dealer)]
+        return float(
+            win_prob[min(score, MAX_ROUND_VALUE), opponent_score] -
+            win_prob[score - points, opponent_score]
+        )
+
+    def _get_observation(self):
+        if self.obs_mode == "numeric":
+            return encode_observation(self, self._observation)
+        return self.state
+
     def _get_scores(self):
         player_score = self.scores[self.player]
         opponent_scores = self.scores[np.setdiff1d(range(self.n_players),
@@ -572,9 +903,10 @@ class CribbageEnv(gym.Env):
 
     def _update_table_value(self):
         """
-        Calculates the value of all cards played on the table.
+        Value of all cards played on the table, kept up to date by the
+        pegging state.
         """
-        self.table_value = np.array([c.value for c in self.table]).sum()
+        self.table_value = self.pegging.total
 
     def _count_playable_cards(self):
         """
@@ -583,23 +915,15 @@ class CribbageEnv(gym.Env):
         the table go over 31.
         """
         counts, playable_hands = [], []
+        limit = MAX_TABLE_VALUE - self.table_value
 
         for hand in self.hands:
-            count = 0
-            playable_hand = []
-
-            for card in hand:
-                if self.table_value + card.value <= MAX_TABLE_VALUE:
-                    count += 1
-                    playable_hand.append(card)
+            playable_hand = [
+                card for card in hand if core.VALUE_OF[card.idx] <= limit]
 
-            counts.append(count)
+            counts.append(len(playable_hand))
             playable_hands.append(playable_hand)
 
-        self.logger.debug("Table={}, playable cards={}".format(
-            self.table_value, playable_hands)
-        )
-
         return(counts, playable_hands)
 
     def _count_remaining_cards(self):
@@ -609,8 +933,6 @@ class CribbageEnv(gym.Env):
         for hand in self.hands:
             remaining_cards += len(hand)
 
-        self.logger.debug('Total remaining cards={}'.format(remaining_cards))
-
         return(remaining_cards)
 
     def _next_avail_player(self, counts, playable_hands):
@@ -619,11 +941,6 @@ class CribbageEnv(gym.Env):
         """
         if sum(counts) != 0:
             while counts[self.player] == 0:
-                self.logger.debug("Go! Skip player {}, hand={}/{}".format(
-                    self.player,
-                    playable_hands[self.player],
-                    self.hands[self.player])
-                )
                 self.player = self.next_player(self.player)
 
     def _reset_table(self):
@@ -632,11 +949,12 @@ class CribbageEnv(gym.Env):
         clears the table by initialzing an empty stack. Called when
         no player can play or the total points on the table is 31.
         """
-        for card in self.table.cards:
+        for card in self.table:
             self.discarded.add_(card)
 
         self.table_value = 0
         self.table = Stack()
+        self.pegging.reset()
 
     def _reset_hand(self, dealer=None, reward_id=None):
         """
@@ -644,9 +962,7 @@ class CribbageEnv(gym.Env):
         cards to each of the n_player's hands, and randomly selects the
         dealer. Each user receives the appropriate number of cards.
         """
-        self.logger.debug("New hand!")
-
-        self.deck = Deck()
+        self.deck.shuffle()
 
         # Stores the playable cards in each player's hand.
         self.hands = [Stack() for i in range(self.n_players)]
@@ -656,6 +972,7 @@ class CribbageEnv(gym.Env):
 
         # Stores the cards played by each player (in order) for The Play.
         self.table = Stack()
+        self.pegging = PeggingState()
 
         # Stores the crib generated during The Deal.
         self.crib = Stack()
@@ -663,10 +980,9 @@ class CribbageEnv(gym.Env):
         self.discarded = Stack()
 
         # Randomly select the dealer. Initalize the player to be the same.
-        self.dealer = random.randint(0, self.n_players - 1) if dealer is None \
-                                                            else dealer
+        self.dealer = int(self.rng.integers(self.n_players)) \
+            if dealer is None else dealer
 
-        self.logger.debug("Player {} has the crib".format(self.dealer))
         self.player = copy(self.dealer)
         self.last_player = copy(self.dealer)
 
@@ -677,8 +993,13 @@ class CribbageEnv(gym.Env):
         # Deal cards to all users.
         for i in range(self.n_players):
             for j in range(self._cards_per_hand):
-                self.hands[i].add_(self.deck.deal(player=i))
-            self.logger.debug("Player {}'s hand: {}".format(i, self.hands[i]))
+                self.hands[i].add_(self.deck.deal())
+
+        if self._trace is not None:
+            self._trace(trace.Event(trace.NEW_HAND, self.dealer, -1, 0, 0))
+            for i, hand in enumerate(self.hands):
+                for card in hand:
+                    self._trace(trace.Event(trace.DEAL, i, card.idx, 0, 0))
 
         # Return the hand of the dealer.
         player_score, opponent_scores = self._get_scores()
@@ -696,18 +1017,14 @@ class CribbageEnv(gym.Env):
 
         return(reward, done, "Reset Hand!")
 
-    def _evaluate_play(self):
+    def _evaluate_play(self, card):
         """
         Evaluates points for the last-played card during The Play.
-        These calculations do not include the starter.
+        These calculations do not include the starter. The pegging state
+        gives the same points as evaluate_table(self.table), without
+        re-scanning the table.
         """
-        points = evaluate_table(self.table)
-
-        self.logger.debug('PLAY: player {} earned {} points'.format(
-            self.player, points)
-        )
-
-        return(points)
+        return(self.pegging.play(card.idx))
 
     def _evaluate_show(self):
         """
@@ -720,9 +1037,8 @@ class CribbageEnv(gym.Env):
             starter=self.starter[0]
         )
 
-        self.logger.debug('SHOW: player {} earned {} points'.format(
-            self.player, points)
-        )
+        if self._trace is not None:
+            self._trace(trace.Event(trace.SHOW, self.player, -1, points, 0))
 
         if self.player == self.dealer:
             crib_points = evaluate_cards(
@@ -731,104 +1047,32 @@ class CribbageEnv(gym.Env):
                 is_crib=True
             )
             points += crib_points
-            self.logger.debug('SHOW CRIB: player {} earned {} points'.format(
-                self.player, points)
-            )
+
+            if self._trace is not None:
+                self._trace(trace.Event(
+                    trace.CRIB, self.player, -1, crib_points, 0))
 
         return(points)
 
 
 def evaluate_table(cards):
-    points = 0
-
-    if sum(c.value for c in cards) == 15:
-        points += 2
-
-    # Pair points
-    pair_point = 0
-    for i in range(-2, -min(len(cards)+1, 5), -1):
-        if cards[-1].rank == cards[i].rank:
-            if i == -2:
-                pair_point = 2
-            elif i == -3:
-                pair_point = 6
-            elif i == -4:
-                pair_point = 12
-        else:
-            break
-
-    points += pair_point
-
-    # Run points
-    for i in reversed(range(-3, -len(cards)-1, -1)):
-        if is_sequence(cards[i:]):
-            points += len(cards[i:])
-            break
-
-    return points
+    """
+    Evaluates the points earned by the last card played on the table.
+    """
+    return core.evaluate_table([c.idx for c in cards])
 
 
 def evaluate_cards(cards, starter=None, is_crib=False):
     """
     This is to evaluate the number of points in a hand. Optionally with the
-    knob
+    knob. Fifteens, pairs and runs only depend on the ranks of the cards and
+    are read from a precomputed table (see tables.py).
     """
-
-    points = 0
-
-    # If only one card on the table.
-    if len(cards) == 1:
-        return(points)
-
-    # Sequence of cards, with or without the starter.
-    cards_without_starter = Stack.from_stack(cards)
-    if starter is not None:
-        cards = cards.add(starter)
-
-    # List of all card combinations: 2 in n, 3 in n, ..., n in n
-    all_combinations = defaultdict(list)
-    for i in range(2, len(cards) + 1):
-        all_combinations[i].extend(list(combinations(cards, i)))
-
-    # Check for pairs. Check only the combinations of two cards
-    for combination in all_combinations[2]:
-        left, right = combination
-
-        if left.rank_value == right.rank_value:
-            points += 2
-
-    # Check for suits, starting with full deck. Minimum 3 cards.
-    # Since we reverse through all_combinations, finds the longest sequence.
-    sequence_found = False
-
-    for length in reversed(sorted(all_combinations.keys())):
-        if length < 3:
-            continue
-
-        for combination in all_combinations[length]:
-            if is_sequence(combination):
-                points += len(combination)
-                sequence_found = True
-
-        if sequence_found:
-            break
-
-    points += same_suit_points(cards_without_starter, starter, is_crib)
-
-    # Check for 15s, starting with two card combinations.
-    for length in sorted(all_combinations.keys()):
-        for combination in all_combinations[length]:
-            cards = list(sorted(combination))
-            if sum(c.value for c in cards) == 15:
-                points += 2
-
-    # Check for cards with same suit as starter.
-    if starter is not None:
-        for card in cards_without_starter:
-            if card.rank == "J" and card.suit == starter.suit:
-                points += 1
-
-    return(points)
+    return core.evaluate_cards(
+        [c.idx for c in cards],
+        starter=None if starter is None else starter.idx,
+        is_crib=is_crib
+    )
 
 
 def is_sequence(cards):
@@ -848,22 +1092,11 @@ def same_suit_points(hand, knob, is_crib=False):
     # to be of the same suit. Otherwise you only need the cards in your hands
     # to be of the same suit. If the knob is also of the same suit then you
     # get an extra point
-
-    points = 0
-    hand_without_knob = Stack.from_stack(hand)
-    if knob is not None:
-        hand = hand.add(knob)
-
-    if is_crib:
-        # Checking the hand that includes the knob
-        if len(set([c.suit for c in hand])) == 1:
-            points += len(hand)
-    else:
-        if len(set([c.suit for c in hand_without_knob])) == 1:
-            points += len(hand_without_knob)
-            if knob is not None and knob.suit == hand_without_knob[0].suit:
-                points += 1
-    return points
+    return core.same_suit_points(
+        [c.idx for c in hand],
+        None if knob is None else knob.idx,
+        is_crib
+    )
 
 
 def card_to_idx(card):
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Expected points of every possible discard during The Deal.
+
+For each way of throwing cards to the crib, the kept hand is scored with
+every possible starter, and the crib with every possible starter and every
+possible set of cards thrown by the opponents. Results only depend on the
+hand up to a permutation of the suits, so they are cached by its canonical
+form (see canonical.py).
+
+The crib tables hold the expected crib points of every discard on its own,
+with the starter and the other cards of the crib drawn from the rest of the
+deck. They ignore the cards kept in hand, which makes them an approximation,
+but turn the crib part of discard_ev into lookups. They are built across a
+process pool on first use (or with `python -m gym_cribbage.envs.tables`) and
+memory-mapped.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import combinations, combinations_with_replacement
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.batch_scoring import (
+    RANK_OF,
+    nobs_points_batch,
+    same_suit_points_batch,
+    show_rank_points_batch,
+)
+from gym_cribbage.envs.canonical import permute_suits, suit_canonical
+from gym_cribbage.envs.tables import get_table, register_table
+
+# Number of canonical hands kept in the cache.
+DISCARD_CACHE_SIZE = 4096
+
+CRIB_SIZES = {2: 4, 3: 3, 4: 4}
+
+
+class DiscardEV(object):
+    """
+    Expected points of every possible discard of a hand:
+    1) The discards, as tuples of card ids.
+    2) The expected points of the cards kept in hand.
+    3) The expected points of the crib.
+    4) The expected total for the player: the crib counts for them if they
+       are the dealer and against them otherwise.
+    """
+
+    def __init__(self, discards, hand, crib, is_dealer):
+        self.discards = discards
+        self.hand = hand
+        self.crib = crib
+        self.total = hand + crib if is_dealer else hand - crib
+
+    @property
+    def best(self):
+        """The discard with the best expected total."""
+        return self.discards[int(np.argmax(self.total))]
+
+
+def discard_ev(hand, is_dealer, n_players=2, crib_table=False):
+    """
+    Expected hand and crib points of every discard of `hand`.
+
+    Params
+    ======
+        hand: list of card ids or Stack
+            The cards dealt to the player.
+        is_dealer: bool
+            Whether the crib belongs to the player.
+        n_players: int
+            Number of players, which sets the size of the hand and the crib.
+        crib_table: bool
+            Whether to take the crib points from the crib table, which is
+            much faster, but ignores the cards kept in hand.
+
+    Returns
+    =======
+        DiscardEV
+    """
+    if hasattr(hand, "ids"):
+        hand = hand.ids
+    hand = [int(c) for c in hand]
+
+    n_cards = core.CARDS_PER_HAND[n_players]
+    if len(hand) != n_cards or len(set(hand)) != len(hand):
+        raise ValueError("{} players are dealt {} distinct cards.".format(
+            n_players, n_cards))
+
+    canonical, permutation = suit_canonical(hand)
+    canonical_discards, hand_points, crib_points = _canonical_discard_ev(
+        canonical, n_players, crib_table)
+
+    # Map the discards of the canonical hand back to the cards of `hand`.
+    rows = {d: i for i, d in enumerate(canonical_discards)}
+    position = {c: i for i, c in enumerate(canonical)}
+
+    discards, order = [], []
+    for discard in combinations(hand, len(hand) - 4):
+        discards.append(discard)
+        order.append(rows[tuple(sorted(
+            position[permute_suits(c, permutation)] for c in discard))])
+
+    return DiscardEV(discards, hand_points[order], crib_points[order],
+                     is_dealer)
+
+
+def crib_ev(discard, n_players=2):
+    """
+    Expected crib points of the card ids `discard` from the crib table, over
+    every starter and cards of the other players drawn from the rest of the
+    deck.
+    """
+    n_discard = core.CARDS_PER_HAND[n_players] - 4
+    if len(discard) != n_discard or len(set(discard)) != n_discard:
+        raise ValueError("{} players discard {} distinct cards.".format(
+            n_players, n_discard))
+    return float(get_table("crib_{}".format(n_players))[tuple(discard)])
+
+
+@lru_cache(maxsize=None)
+def _completions(n_unknown, n_cards):
+    """
+    Every (starter, other cards) drawn from n_unknown cards, as indices:
+    starters (M,) and others (M, n_cards).
+    """
+    starters, others = [], []
+    for starter in range(n_unknown):
+        rest = [i for i in range(n_unknown) if i != starter]
+        for cards in combinations(rest, n_cards):
+            starters.append(starter)
+            others.append(cards)
+
+    others = np.array(others, dtype=np.int64).reshape(-1, n_cards)
+    return np.array(starters, dtype=np.int64), others
+
+
+def _score(cards, starters, is_crib):
+    """Show points of (N, n_cards) card ids with their (N,) starters."""
+    ranks = RANK_OF[np.concatenate([cards, starters[:, None]], axis=1)]
+    return show_rank_points_batch(ranks) + \
+        same_suit_points_batch(cards, starters, is_crib) + \
+        nobs_points_batch(cards, starters)
+
+
+def _crib_points(discard, unknown, n_players):
+    """
+    Expected points of the cribs holding the card ids `discard`, completed
+    with every starter and other cards drawn from `unknown`.
+    """
+    n_discard = len(discard)
+    starters, others = _completions(len(unknown),
+                                    CRIB_SIZES[n_players] - n_discard)
+    starters, others = unknown[starters], unknown[others]
+    thrown = np.broadcast_to(discard, (len(others), n_discard))
+    cribs = np.concatenate([thrown, others], axis=1)
+    return _score(cribs, starters, is_crib=True).mean()
+
+
+def _crib_table_entry(discard, n_players):
+    unknown = np.setdiff1d(np.arange(core.N_CARDS), discard)
+    return _crib_points(np.array(discard, dtype=np.int64), unknown,
+                        n_players)
+
+
+def build_crib_table(n_players, n_workers=None):
+    """
+    Expected crib points of every discard with `n_players`: a (52, 52)
+    table of pairs (NaN on the diagonal) with 2 players, else a (52,) table
+    of single cards. Discards equal up to a permutation of the suits have
+    the same value, so only one discard per class is computed.
+    """
+    ranks = range(1, core.N_RANKS + 1)
+    if core.CARDS_PER_HAND[n_players] - 4 == 1:
+        discards = [(core.card_id(r, 0),) for r in ranks]
+    else:
+        # Pairs of ranks, of the same suit or not.
+        discards = [(core.card_id(r1, 0), core.card_id(r2, 1))
+                    for r1, r2 in combinations_with_replacement(ranks, 2)]
+        discards += [(core.card_id(r1, 0), core.card_id(r2, 0))
+                     for r1, r2 in combinations(ranks, 2)]
+
+    with ProcessPoolExecutor(n_workers) as executor:
+        points = list(executor.map(
+            partial(_crib_table_entry, n_players=n_players), discards))
+
+    classes = {suit_canonical(d)[0]: p for d, p in zip(discards, points)}
+    n_discard = len(discards[0])
+    table = np.full((core.N_CARDS,) * n_discard, np.nan)
+    for discard in combinations(range(core.N_CARDS), n_discard):
+        canonical = suit_canonical(discard)[0]
+        table[discard] = table[discard[::-1]] = classes[canonical]
+
+    return table
+
+
+for _n_players in core.CARDS_PER_HAND:
+    register_table("crib_{}".format(_n_players),
+                   partial(build_crib_table, _n_players), mmap_mode="r")
+
+
+@lru_cache(maxsize=DISCARD_CACHE_SIZE)
+def _canonical_discard_ev(hand, n_players, crib_table=False):
+    hand = np.array(hand, dtype=np.int64)
+    unknown = np.setdiff1d(np.arange(core.N_CARDS), hand)
+    n_discard = len(hand) - 4
+    discards = list(combinations(range(len(hand)), n_discard))
+
+    # Kept hands, scored with every starter.
+    kept = np.array([[c for i, c in enumerate(hand) if i not in discard]
+                     for discard in discards])
+    n_starters = len(unknown)
+    hand_points = _score(
+        np.repeat(kept, n_starters, axis=0),
+        np.tile(unknown, len(discards)),
+        is_crib=False
+    ).reshape(len(discards), n_starters).mean(axis=1)
+
+    # Cribs, completed by the opponents' cards and scored with every starter.
+    crib_points = np.empty(len(discards))
+    for i, discard in enumerate(discards):
+        thrown = hand[list(discard)]
+        if crib_table:
+            crib_points[i] = crib_ev(thrown.tolist(), n_players)
+        else:
+            crib_points[i] = _crib_points(thrown, unknown, n_players)
+
+    for points in (hand_points, crib_points):
+        points.setflags(write=False)
+
+    return discards, hand_points, crib_points
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed-layout numeric encoding of the state of a CribbageEnv, from the point
+of view of the current player. The observation is a float32 vector made of:
+
+    hand         52  one-hot of the cards in the player's hand.
+    table        13  ids + 1 of the cards on the table, in order, 0 padded.
+    dealer        1  1 if the player owns the crib.
+    phase         3  one-hot of the phase.
+    table value   1  value of the cards on the table.
+    scores        4  score of the player, then of the next players in seat
+                     order, 0 padded.
+    mask         53  1 for the legal actions of the player: the cards they
+                     can play, or the no-op during The Show.
+"""
+
+import gym
+import numpy as np
+
+from gym_cribbage.envs.core import MAX_TABLE_VALUE, N_ACTIONS, N_CARDS
+
+# The most cards that fit on the table without going over 31: A A A A 2 2 2 2
+# 3 3 3 4 4 (29).
+MAX_TABLE_CARDS = 13
+MAX_PLAYERS = 4
+MAX_SCORE = 255  # Scores are stored as uint8.
+
+OBS_HAND = slice(0, N_CARDS)
+OBS_TABLE = slice(OBS_HAND.stop, OBS_HAND.stop + MAX_TABLE_CARDS)
+OBS_DEALER = OBS_TABLE.stop
+OBS_PHASE = slice(OBS_DEALER + 1, OBS_DEALER + 4)
+OBS_TABLE_VALUE = OBS_PHASE.stop
+OBS_SCORES = slice(OBS_TABLE_VALUE + 1, OBS_TABLE_VALUE + 1 + MAX_PLAYERS)
+OBS_MASK = slice(OBS_SCORES.stop, OBS_SCORES.stop + N_ACTIONS)
+OBS_SIZE = OBS_MASK.stop
+
+
+def observation_space():
+    high = np.ones(OBS_SIZE, dtype=np.float32)
+    high[OBS_TABLE] = N_CARDS
+    high[OBS_TABLE_VALUE] = MAX_TABLE_VALUE
+    high[OBS_SCORES] = MAX_SCORE
+    return gym.spaces.Box(low=np.zeros(OBS_SIZE, dtype=np.float32),
+                          high=high, dtype=np.float32)
+
+
+def encode_observation(env, out):
+    """
+    Writes the observation of the current player of `env` into the
+    preallocated float32 array `out` and returns it.
+    """
+    out[:] = 0
+    player = env.player
+
+    out[env.hands[player].ids] = 1
+
+    table = env.table.ids
+    out[OBS_TABLE.start:OBS_TABLE.start + len(table)] = table
+    out[OBS_TABLE.start:OBS_TABLE.start + len(table)] += 1
+
+    out[OBS_DEALER] = player == env.dealer
+    out[OBS_PHASE.start + env.phase] = 1
+    out[OBS_TABLE_VALUE] = env.table_value
+
+    seats = [(player + i) % env.n_players for i in range(env.n_players)]
+    out[OBS_SCORES.start:OBS_SCORES.start + env.n_players] = env.scores[seats]
+
+    out[OBS_MASK] = env.action_mask
+
+    return out
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental scoring of The Play. Rather than re-scanning the table after every
+card like evaluate_table, PeggingState keeps the running total and a state of
+the pegging table (see build_pegging_table in tables.py), which gives the
+points of pairs and runs of the next card in a single lookup.
+"""
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.tables import (
+    MAX_TABLE_VALUE,
+    PEGGING_INVALID,
+    PEGGING_POINT_BITS,
+    PEGGING_POINT_MASK,
+    get_table,
+)
+
+_TRANSITIONS = None
+
+
+def pegging_transitions():
+    """The pegging table as nested lists, faster than NumPy for scalars."""
+    global _TRANSITIONS
+    if _TRANSITIONS is None:
+        _TRANSITIONS = get_table("pegging").tolist()
+    return _TRANSITIONS
+
+
+class PeggingState(object):
+    """
+    State of the table during The Play. play() returns exactly the points of
+    evaluate_table for the table with the new card.
+    """
+
+    __slots__ = ("total", "state", "cards")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clears the table."""
+        self.total = 0
+        self.state = 0
+        # Only read to score tables past 31, see play().
+        self.cards = []
+
+    def play(self, card):
+        """Adds the card id `card` to the table and returns its points."""
+        self.total += core.VALUE_OF[card]
+        self.cards.append(card)
+
+        # Past 31, which the environment does not forbid, states drop cards
+        # that can still score: score the table from scratch.
+        if self.total > MAX_TABLE_VALUE:
+            self.state = PEGGING_INVALID
+            return core.evaluate_table(self.cards)
+
+        entry = pegging_transitions()[self.state][core.RANK_OF[card]]
+
+        self.state = entry >> PEGGING_POINT_BITS
+        points = entry & PEGGING_POINT_MASK
+        return points + 2 if self.total == 15 else points
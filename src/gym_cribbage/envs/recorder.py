@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Binary trajectory files. TrajectoryRecorder wraps a CribbageEnv and appends
+every transition to a file as a fixed-width record of RECORD_DTYPE, after a
+HEADER_SIZE bytes header. read_trajectories() memory-maps the file, so the
+fields of the records are NumPy views of the file that are only read from
+disk when accessed.
+
+Each record describes one step:
+
+    actor      the player who took the action.
+    phase      the phase in which the action was taken.
+    action     the card id played or discarded, ACTION_NOOP during The Show.
+    reward     the reward of the step: the points scored, or the change in
+               win probability with reward_mode="win_prob".
+    reward_id  the player receiving the reward, -1 if none.
+    done       1 if the step ended the game.
+    scores     the scores of the players after the step, in seat order, 0
+               padded to 4 players.
+    hand       bitmask of the card ids in the actor's hand before the step.
+    table      the card ids on the table before the step, in order,
+               padded with TABLE_PAD. Only the first MAX_TABLE_CARDS are
+               kept when a count goes past 31, which the environment
+               allows.
+    table_len  the number of cards on the table before the step.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from gym_cribbage.envs.core import ACTION_NOOP
+from gym_cribbage.envs.observation import MAX_PLAYERS, MAX_TABLE_CARDS
+
+MAGIC = b"CRIBTRAJ"
+VERSION = 2
+HEADER_SIZE = 64
+TABLE_PAD = 255
+
+RECORD_DTYPE = np.dtype([
+    ("actor", np.uint8),
+    ("phase", np.uint8),
+    ("action", np.uint8),
+    ("reward", np.float32),
+    ("reward_id", np.int8),
+    ("done", np.uint8),
+    ("scores", np.uint8, (MAX_PLAYERS,)),
+    ("hand", np.uint64),
+    ("table", np.uint8, (MAX_TABLE_CARDS,)),
+    ("table_len", np.uint8),
+])
+
+# Magic, version, record size and number of players, padded to HEADER_SIZE.
+_HEADER = struct.Struct("<8sIII")
+
+
+def _write_header(f, n_players):
+    header = _HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, n_players)
+    f.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+def read_header(path):
+    """
+    Checks the header of a trajectory file and returns its number of
+    players.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+
+    if len(header) < HEADER_SIZE:
+        raise ValueError("{} is not a trajectory file.".format(path))
+
+    magic, version, record_size, n_players = _HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError("{} is not a trajectory file.".format(path))
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError("{} has version {}, expected {}.".format(
+            path, version, VERSION))
+
+    return n_players
+
+
+def read_trajectories(path):
+    """
+    Memory-maps the records of a trajectory file.
+
+    Params
+    ======
+        path: str
+            A file written by TrajectoryRecorder.
+
+    Returns
+    =======
+        records: read-only np.memmap of RECORD_DTYPE
+            Ignores a trailing partial record, if the file is being written.
+    """
+    read_header(path)
+    n_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if n_records == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE,
+                     shape=(n_records,))
+
+
+class TrajectoryRecorder(object):
+    """
+    Wraps a CribbageEnv and appends each of its steps to the trajectory file
+    `path`, which is created if needed. Records are buffered in memory and
+    written `buffer_size` at a time, and by flush() and close().
+
+    Every other attribute is the wrapped environment's.
+    """
+
+    def __init__(self, env, path, buffer_size=4096):
+        self.env = env
+        self.path = path
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            if read_header(path) != env.n_players:
+                raise ValueError("{} holds games of {} players.".format(
+                    path, read_header(path)))
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            _write_header(self._file, env.n_players)
+
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._n_buffered = 0
+
+    def __getattr__(self, name):
+        # env is missing while copying or unpickling the recorder.
+        if name == "env":
+            raise AttributeError(name)
+        return getattr(self.env, name)
+
+    def reset(self, *args, **kwargs):
+        return self.env.reset(*args, **kwargs)
+
+    def step(self, action):
+        env = self.env
+        record = self._buffer[self._n_buffered]
+
+        record["actor"] = env.player
+        record["phase"] = env.phase
+        record["hand"] = env.hands[env.player].mask
+
+        table = env.table.ids[:MAX_TABLE_CARDS]
+        record["table"] = TABLE_PAD
+        record["table"][:len(table)] = table
+        record["table_len"] = len(env.table)
+
+        if env.phase == 2:
+            record["action"] = ACTION_NOOP
+        elif isinstance(action, (int, np.integer)):
+            record["action"] = action
+        else:
+            record["action"] = action.idx
+
+        observation, reward, done, debug = env.step(action)
+
+        reward_id = env.state.reward_id
+        record["reward"] = reward
+        record["reward_id"] = -1 if reward_id is None else reward_id
+        record["done"] = done
+        record["scores"] = 0
+        record["scores"][:env.n_players] = env.scores
+
+        self._n_buffered += 1
+        if self._n_buffered == len(self._buffer):
+            self.flush()
+
+        return(observation, reward, done, debug)
+
+    def flush(self):
+        """Writes the buffered records to the file."""
+        self._buffer[:self._n_buffered].tofile(self._file)
+        self._n_buffered = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Headless games of cribbage, to evaluate policies quickly. simulate() plays
+complete games with the rules of CribbageEnv, on card ids, without building
+observations, and returns aggregate results.
+
+A policy is a callable taking a Turn and returning the id of the card to
+discard (during The Deal) or to play (during The Play). The Show needs no
+decision. Games played by simulate(n_games, policies, seed, dealer) are the
+games CribbageEnv(n_players, seed=seed) plays when it is reset(dealer) n_games
+times and stepped with the same decisions.
+"""
+
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.core import CARDS_PER_HAND, MAX_TABLE_VALUE
+from gym_cribbage.envs.cribbage_env import MAX_ROUND_VALUE
+from gym_cribbage.envs.pegging import PeggingState
+
+
+class Turn(object):
+    """
+    What a policy sees when it is its turn. The same Turn is updated in place
+    for every decision, and its lists belong to the simulator: policies
+    must not modify them.
+    1) The player to act, the dealer and the number of players.
+    2) The phase: 0 for The Deal, 1 for The Play.
+    3) The card ids in the player's hand, and those that can be played.
+       During The Deal, every card can be discarded.
+    4) The card ids on the table in the current count, and their value.
+    5) The scores of all players, in seat order.
+    """
+
+    __slots__ = ("player", "dealer", "n_players", "phase", "hand", "playable",
+                 "table", "table_value", "scores")
+
+    def __init__(self, n_players):
+        self.n_players = n_players
+        self.player = self.dealer = self.phase = self.table_value = 0
+        self.hand = self.playable = self.table = self.scores = []
+
+
+class SimulationResult(object):
+    """
+    Results of simulate():
+    1) winners: (n_games,) the player who won each game.
+    2) scores: (n_games, n_players) the final scores.
+    3) margins: (n_games,) the score of the winner minus the best score of
+       the other players.
+    4) phase_points: (n_games, n_players, 3) the points scored by each
+       player during The Deal (his heels), The Play and The Show.
+    """
+
+    def __init__(self, winners, scores, phase_points):
+        self.winners = winners
+        self.scores = scores
+        self.phase_points = phase_points
+
+        others = np.sort(scores, axis=1)[:, -2]
+        self.margins = scores.max(axis=1) - others
+
+    @property
+    def win_rates(self):
+        """The fraction of the games won by each player."""
+        n_players = self.scores.shape[1]
+        return np.bincount(self.winners, minlength=n_players) / \
+            float(len(self.winners))
+
+
+def simulate(n_games, policies, seed=None, dealer=None):
+    """
+    Plays n_games complete games.
+
+    Params
+    ======
+        n_games: int
+            Number of games to play.
+        policies: list of callables
+            The policy of each player, which sets the number of players.
+        seed: int or None
+            Seed of the deals and of the first dealer of each game.
+        dealer: int or None
+            The first dealer of every game. Random if None.
+
+    Returns
+    =======
+        SimulationResult
+    """
+    n_players = len(policies)
+    if n_players < 2 or n_players > 4:
+        raise ValueError("Cribbage is played by 2-4 players.")
+
+    # Same random draws as the Deck and the resets of a seeded CribbageEnv.
+    rng = np.random.default_rng(seed)
+    order = np.arange(core.N_CARDS)
+    rng.shuffle(order)
+
+    winners = np.zeros(n_games, dtype=np.int64)
+    scores = np.zeros((n_games, n_players), dtype=np.int64)
+    phase_points = np.zeros((n_games, n_players, 3), dtype=np.int64)
+
+    for game in range(n_games):
+        rng.shuffle(order)
+        first_dealer = int(rng.integers(n_players)) \
+            if dealer is None else dealer
+        winners[game] = _play_game(policies, rng, order, first_dealer,
+                                   scores[game], phase_points[game])
+
+    return SimulationResult(winners, scores, phase_points)
+
+
+def _play_game(policies, rng, order, dealer, scores, phase_points):
+    """
+    Plays one game from a shuffled `order`, writing the final scores and the
+    points of each phase in place, and returns the winner.
+    """
+    n_players = len(policies)
+    pegging = PeggingState()
+
+    totals = [0] * n_players
+    turn = Turn(n_players)
+    turn.scores = totals
+
+    def score(player, phase, points):
+        totals[player] += points
+        scores[player] = totals[player]
+        phase_points[player, phase] += points
+        return totals[player] >= MAX_ROUND_VALUE
+
+    first_hand = True
+    while True:
+        # The first hand uses the deck shuffled by simulate().
+        if not first_hand:
+            rng.shuffle(order)
+        first_hand = False
+
+        winner = _play_hand(policies, order.tolist(), dealer, score, turn,
+                            pegging)
+        if winner is not None:
+            return winner
+
+        dealer = (dealer + 1) % n_players
+
+
+def _play_hand(policies, cards, dealer, score, turn, pegging):
+    """
+    Plays one hand dealt from the card ids `cards`. Points are passed to
+    score(player, phase, points), which returns whether the player won.
+    Returns the winner, or None if the hand ended without one.
+    """
+    n_players = len(policies)
+    n_cards = CARDS_PER_HAND[n_players]
+    value_of = core.VALUE_OF
+
+    hands = [cards[i * n_cards:(i + 1) * n_cards] for i in range(n_players)]
+    starter = cards[n_players * n_cards]
+    crib = []
+    turn.dealer = dealer
+
+    # The Deal: one card at a time from the dealer, until every hand holds
+    # 4 cards.
+    turn.phase = 0
+    turn.table = []
+    turn.table_value = 0
+    player = dealer
+    for _ in range(n_players * (n_cards - 4)):
+        hand = hands[player]
+        turn.player = player
+        turn.hand = turn.playable = hand
+        card = policies[player](turn)
+        hand.remove(card)
+        crib.append(card)
+        player = (player + 1) % n_players
+
+    # Two for his (the dealer's) heels.
+    if core.RANK_OF[starter] == core.JACK and score(dealer, 0, 2):
+        return dealer
+
+    # The Play, from the left of the dealer.
+    turn.phase = 1
+    played = [[] for _ in range(n_players)]
+    table = turn.table = []
+    pegging.reset()
+    n_left = 4 * n_players
+    player = (dealer + 1) % n_players
+    while True:
+        hand = hands[player]
+        limit = MAX_TABLE_VALUE - pegging.total
+        turn.player = player
+        turn.hand = hand
+        turn.playable = [c for c in hand if value_of[c] <= limit]
+        turn.table_value = pegging.total
+
+        card = policies[player](turn)
+        if card not in turn.playable:
+            raise ValueError(
+                "Player {} cannot play card {}.".format(player, card))
+
+        hand.remove(card)
+        played[player].append(card)
+        table.append(card)
+        n_left -= 1
+        points = pegging.play(card)
+
+        # The next player who can play, skipping the others.
+        limit = MAX_TABLE_VALUE - pegging.total
+        for i in range(1, n_players + 1):
+            next_player = (player + i) % n_players
+            if any(value_of[c] <= limit for c in hands[next_player]):
+                break
+        else:
+            next_player = None
+
+        # Go! No one can play: points for the last card.
+        if next_player is None:
+            points += 2 if pegging.total == MAX_TABLE_VALUE else 1
+            if score(player, 1, points):
+                return player
+
+            if n_left == 0:
+                break
+
+            pegging.reset()
+            table = turn.table = []
+            for i in range(1, n_players + 1):
+                next_player = (player + i) % n_players
+                if hands[next_player]:
+                    break
+
+        elif score(player, 1, points):
+            return player
+
+        player = next_player
+
+    # The Show, from the left of the dealer, who also counts the crib.
+    for i in range(1, n_players + 1):
+        player = (dealer + i) % n_players
+        points = core.evaluate_cards(played[player], starter)
+        if player == dealer:
+            points += core.evaluate_cards(crib, starter, True)
+        if score(player, 2, points):
+            return player
+
+    return None
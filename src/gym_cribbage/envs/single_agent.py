@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Single-agent view of a CribbageVectorEnv. The learner holds one seat and the
+other seats are played by opponent policies, which are advanced inside
+step() until every game waits for the learner again. The Show needs no
+decision and is advanced for every seat, including the learner's.
+
+An opponent is a callable taking the VectorState of the games in which it
+must act and their (k, 52) boolean masks of playable cards, and returning
+(k,) card ids. It is called once per turn for all of these games, so a
+policy network runs one batch per turn rather than once per game.
+"""
+
+import numpy as np
+
+from gym_cribbage.envs.vector_env import CribbageVectorEnv, VectorState, unpack
+
+
+def random_opponent(rng=None):
+    """An opponent playing uniformly random legal cards."""
+    rng = np.random.default_rng() if rng is None else rng
+
+    def opponent(state, action_mask):
+        scores = rng.random(action_mask.shape) * action_mask
+        return scores.argmax(axis=1)
+
+    return opponent
+
+
+def take_state(state, games):
+    """The VectorState of a subset of the games."""
+    return VectorState(*[getattr(state, field)[games] for field in (
+        "hand", "hand_id", "reward_id", "phase", "player_score",
+        "opponent_score")])
+
+
+class SingleAgentVectorEnv(object):
+    """
+    Plays `n_envs` games of Cribbage in which the learner sits at `seat`.
+
+    Params
+    ======
+        n_envs: int
+            Number of games played at once.
+        opponents: callable or list
+            One opponent playing every other seat, or one opponent per seat
+            (the learner's entry is ignored).
+        seat: int
+            The learner's seat.
+        n_players: int
+        seed: int or None
+    """
+
+    def __init__(self, n_envs, opponents, seat=0, n_players=2, seed=None):
+        super(SingleAgentVectorEnv, self).__init__()
+
+        if not 0 <= seat < n_players:
+            raise ValueError("seat must be in 0..{}.".format(n_players - 1))
+
+        self.env = CribbageVectorEnv(n_envs, n_players=n_players, seed=seed)
+        self.n_envs = n_envs
+        self.n_players = n_players
+        self.seat = seat
+
+        if callable(opponents):
+            opponents = [opponents] * n_players
+        if len(opponents) != n_players:
+            raise ValueError("Expected one opponent per seat.")
+
+        # The seats played by each distinct opponent, which is called once
+        # per turn for all of them.
+        self._seats = {}
+        for i, opponent in enumerate(opponents):
+            if i != seat:
+                self._seats.setdefault(opponent, []).append(i)
+
+    @property
+    def action_mask(self):
+        """Boolean mask (n_envs, 52) of the cards the learner can play."""
+        return unpack(self.env.playable())
+
+    def reset(self, dealer=None):
+        """
+        Starts a new game in every environment and plays until the learner
+        must act. Returns the state of every game.
+        """
+        self.env.reset(dealer)
+        rewards = np.zeros(self.n_envs, dtype=np.int64)
+        dones = np.zeros(self.n_envs, dtype=bool)
+        winners = np.full(self.n_envs, -1, dtype=np.int64)
+        self._advance(rewards, dones, winners)
+        return self.env.state
+
+    def step(self, actions):
+        """
+        Plays the learner's card in every game, then the opponents until the
+        learner must act again.
+
+        Params
+        ======
+            actions: int array (n_envs,)
+                The card id played by the learner in each game.
+
+        Returns
+        =======
+            state, rewards, dones, info: VectorState, int array, bool array,
+            dict
+            rewards are the points scored by the learner since their last
+            action. Finished games are reset and played until the learner
+            must act, and info["winner"] holds the seat of their winner
+            (-1 for the other games).
+        """
+        state, points, dones, _ = self.env.step(actions)
+        rewards = points * (state.reward_id == self.seat)
+        winners = np.where(dones, state.reward_id, -1)
+
+        self._advance(rewards, dones, winners)
+        return(self.env.state, rewards, dones, {"winner": winners})
+
+    def _waiting(self):
+        """Games in which the learner must pick a card."""
+        env = self.env
+        return (env.phase < 2) & (env.player == self.seat)
+
+    def _advance(self, rewards, dones, winners):
+        """Steps the games until the learner must act in each of them."""
+        env = self.env
+        while True:
+            games = np.flatnonzero(~self._waiting())
+            if len(games) == 0:
+                return
+
+            actions = np.zeros(self.n_envs, dtype=np.int64)
+            masks = unpack(env.playable(games))
+            for opponent, seats in self._seats.items():
+                turn = np.isin(env.player[games], seats) & \
+                    (env.phase[games] < 2)
+                if turn.any():
+                    actions[games[turn]] = opponent(
+                        take_state(env.state, games[turn]), masks[turn])
+
+            state, points, done, _ = env.step(actions, games=games)
+            rewards += points * (state.reward_id == self.seat)
+            winners[done] = state.reward_id[done]
+            dones |= done
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Exact solver of The Play for 2 players when both hands are known.
+
+The value of a position is the number of points the player to move will peg
+until the end of The Play, minus the points of their opponent, when both play
+optimally. It is found by a negamax search with alpha-beta pruning and a
+transposition table. Suits never score during The Play, so hands are searched
+as sorted tuples of ranks, and cards of the same rank are a single move.
+
+Scoring is that of PeggingState: counts are walked on the pegging automaton
+(see build_pegging_table in tables.py), and a count is its total and its
+automaton state, which is also how the transposition table keys it. The go
+rules are those of CribbageEnv.step: when no one can play, the last player
+pegs 1, or 2 at 31, and the next player with cards starts a new count.
+"""
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.core import MAX_TABLE_VALUE
+from gym_cribbage.envs.pegging import pegging_transitions
+from gym_cribbage.envs.tables import (
+    PEGGING_POINT_BITS,
+    PEGGING_POINT_MASK,
+    rank_value,
+)
+
+# Exact value, lower bound and upper bound entries of the transposition table.
+EXACT, LOWER, UPPER = 0, 1, 2
+
+INFINITY = float("inf")
+
+# The count before the first card: total and state of the pegging automaton.
+EMPTY_COUNT = (0, 0)
+
+
+def play_rank(count, rank):
+    """
+    Plays a card of `rank` on a count, which must stay within 31.
+
+    Returns
+    =======
+        points, count: int, tuple
+    """
+    total, state = count
+    entry = pegging_transitions()[state][rank]
+    total += rank_value(rank)
+    points = entry & PEGGING_POINT_MASK
+    if total == 15:
+        points += 2
+    return points, (total, entry >> PEGGING_POINT_BITS)
+
+
+def count_of(table):
+    """The count after the card ids of `table` were played in order."""
+    count = EMPTY_COUNT
+    for card in table:
+        _, count = play_rank(count, core.RANK_OF[card])
+    return count
+
+
+def _can_play(ranks, total):
+    limit = MAX_TABLE_VALUE - total
+    return any(rank_value(r) <= limit for r in ranks)
+
+
+def _playable(hand, total):
+    """
+    Positions in the sorted ranks `hand` of the ranks that can be played,
+    one per rank.
+    """
+    limit = MAX_TABLE_VALUE - total
+    return [i for i, rank in enumerate(hand)
+            if rank_value(rank) <= limit and not (i and hand[i - 1] == rank)]
+
+
+class PeggingSolver(object):
+    """
+    Solves positions of The Play. The transposition table is kept between
+    calls, so positions reached from a solved position are solved instantly.
+    """
+
+    def __init__(self):
+        self.table = {}
+
+    def solve(self, hands, player, table=()):
+        """
+        The value of a position and the best card to play.
+
+        Params
+        ======
+            hands: pair of lists of card ids (or Stacks)
+                The cards left in the hand of each player.
+            player: int
+                The player to move, who must be able to play.
+            table: list of card ids (or Stack)
+                The cards of the current count, in order.
+
+        Returns
+        =======
+            value, card: int, int
+                The points the player will peg until the end of The Play
+                minus their opponent's, and a card achieving them.
+        """
+        hands = [h.ids if hasattr(h, "ids") else [int(c) for c in h]
+                 for h in hands]
+        if hasattr(table, "ids"):
+            table = table.ids
+
+        count = count_of(table)
+        ranks = tuple(tuple(sorted(core.RANK_OF[c] for c in h))
+                      for h in hands)
+        if not _can_play(ranks[player], count[0]):
+            raise ValueError("Player {} cannot play.".format(player))
+
+        # Moves failing low against the best value so far are bounds below
+        # it, so the best move found is exact.
+        hand = ranks[player]
+        best_value, best_rank = -INFINITY, None
+        for i in _playable(hand, count[0]):
+            value = self._move(ranks, player, count, i, best_value, INFINITY)
+            if value > best_value:
+                best_value, best_rank = value, hand[i]
+
+        card = next(c for c in hands[player] if core.RANK_OF[c] == best_rank)
+        return int(best_value), card
+
+    def value(self, ranks, player, count, alpha=-INFINITY, beta=INFINITY):
+        """
+        Negamax value of a position given as sorted tuples of ranks, within
+        the (alpha, beta) window.
+        """
+        key = (ranks, player, count)
+        entry = self.table.get(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER and value >= beta:
+                return value
+            if flag == UPPER and value <= alpha:
+                return value
+
+        alpha_start = alpha
+        best = -INFINITY
+        for i in _playable(ranks[player], count[0]):
+            value = self._move(ranks, player, count, i, alpha, beta)
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_start:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (best, flag)
+
+        return best
+
+    def _move(self, ranks, player, count, i, alpha, beta):
+        """
+        The value of playing the i-th rank of the player's hand, exact if it
+        is within the (alpha, beta) window, else a bound past the window.
+        """
+        hand = ranks[player]
+        opponent = 1 - player
+
+        points, next_count = play_rank(count, hand[i])
+        next_ranks = list(ranks)
+        next_ranks[player] = hand[:i] + hand[i + 1:]
+        next_ranks = tuple(next_ranks)
+        total = next_count[0]
+
+        # The opponent plays next if they can, else the player goes on.
+        if _can_play(next_ranks[opponent], total):
+            next_player = opponent
+        elif _can_play(next_ranks[player], total):
+            next_player = player
+
+        # Go! No one can play: points for the last card, new count.
+        else:
+            points += 2 if total == MAX_TABLE_VALUE else 1
+            if not next_ranks[0] and not next_ranks[1]:
+                return points
+            next_count = EMPTY_COUNT
+            next_player = opponent if next_ranks[opponent] else player
+
+        if next_player == player:
+            return points + self.value(next_ranks, player, next_count,
+                                       alpha - points, beta - points)
+        return points - self.value(next_ranks, opponent, next_count,
+                                   points - beta, points - alpha)
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed lookup tables used by the scoring functions.
+
+Tables are built once, saved as .npy files and loaded lazily on first use.
+Large tables can be registered to be memory-mapped rather than read, so that
+each process only pages in the entries it uses. The directory holding them
+defaults to the `data` folder next to this module and can be overridden with
+the GYM_CRIBBAGE_TABLE_DIR environment variable.
+The tables can be built ahead of time with:
+
+    python -m gym_cribbage.envs.tables
+"""
+
+from itertools import combinations, combinations_with_replacement
+import logging
+import os
+import tempfile
+import numpy as np
+
+TABLE_DIR = os.environ.get(
+    "GYM_CRIBBAGE_TABLE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+
+# Rank indices start at 1 (0 is padding), see RANK_TO_IDX in cribbage_env.
+N_RANKS = 13
+RANK_BASE = N_RANKS + 1
+
+# Largest number of cards scored at once during The Show (hand + starter).
+MAX_SHOW_CARDS = 5
+
+MAX_TABLE_VALUE = 31  # Max points allowed before hand reset.
+
+# Points for 1, 2, 3 or 4 cards of the same rank played in a row.
+PAIR_POINTS = (0, 0, 2, 6, 12)
+
+_TABLES = {}
+_BUILDERS = {}
+_MMAP_MODES = {}
+
+logger = logging.getLogger(__name__)
+
+# mkstemp creates files readable by their owner only: saved tables get the
+# mode of a regular file instead. The umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+TABLE_FILE_MODE = 0o666 & ~_UMASK
+
+
+def register_table(name, builder, mmap_mode=None):
+    """
+    Registers a function building the table `name` when it is missing. With
+    a `mmap_mode` (see numpy.load), the saved table is memory-mapped.
+    """
+    _BUILDERS[name] = builder
+    _MMAP_MODES[name] = mmap_mode
+
+
+def table_path(name):
+    return os.path.join(TABLE_DIR, "{}.npy".format(name))
+
+
+def get_table(name):
+    """
+    Returns the table `name`, loading it from disk or building it on first
+    use. Built tables are saved to TABLE_DIR when it is writable, otherwise
+    they are only kept in memory, as are tables whose file cannot be read.
+    """
+    try:
+        return _TABLES[name]
+    except KeyError:
+        pass
+
+    path = table_path(name)
+    mmap_mode = _MMAP_MODES.get(name)
+    try:
+        table = np.load(path, mmap_mode=mmap_mode)
+    except FileNotFoundError:
+        table = build_table(name)
+        # Saved files are complete (see build_table), safe to map.
+        if mmap_mode is not None and os.path.exists(path):
+            try:
+                table = np.load(path, mmap_mode=mmap_mode)
+            except OSError as e:
+                logger.warning("Could not load table {}: {}".format(name, e))
+    except OSError as e:
+        # For example a file saved by another user without read access.
+        logger.warning("Could not load table {}: {}".format(name, e))
+        table = build_table(name, save=False)
+
+    _TABLES[name] = table
+    return table
+
+
+def build_table(name, save=True):
+    """
+    Builds the table `name` and optionally saves it to TABLE_DIR. The table
+    is written to a temporary file which is then renamed, so processes
+    building the same table at once never read a partly written file.
+    """
+    table = _BUILDERS[name]()
+
+    if save:
+        try:
+            os.makedirs(TABLE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=TABLE_DIR, prefix="{}.".format(name), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, table)
+                os.chmod(tmp_path, TABLE_FILE_MODE)
+                os.replace(tmp_path, table_path(name))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Could not save table {}: {}".format(name, e))
+
+    return table
+
+
+def rank_value(rank):
+    """Points value of a rank index (1 == Ace, ..., 13 == King)."""
+    return min(rank, 10)
+
+
+def show_key(ranks):
+    """
+    Canonical integer key of a multiset of rank indices. The ranks are
+    sorted and read as digits in base 14, so hands of different sizes
+    never collide (a rank index is never 0).
+    """
+    key = 0
+    for rank in sorted(ranks):
+        key = key * RANK_BASE + rank
+    return key
+
+
+def count_rank_points(ranks):
+    """
+    Points of a set of cards that only depend on their ranks: fifteens,
+    pairs and runs. Flushes and nobs depend on suits and are not included.
+    This enumerates every combination and is used to build the show table.
+    """
+    points = 0
+
+    for left, right in combinations(ranks, 2):
+        if left == right:
+            points += 2
+
+    # Only the longest runs are counted.
+    for length in range(len(ranks), 2, -1):
+        n_runs = 0
+        for combination in combinations(ranks, length):
+            if _is_run(combination):
+                n_runs += 1
+        if n_runs:
+            points += n_runs * length
+            break
+
+    for length in range(2, len(ranks) + 1):
+        for combination in combinations(ranks, length):
+            if sum(rank_value(r) for r in combination) == 15:
+                points += 2
+
+    return points
+
+
+def _is_run(ranks):
+    ranks = sorted(ranks)
+    for i in range(1, len(ranks)):
+        if ranks[i - 1] + 1 != ranks[i]:
+            return False
+    return True
+
+
+def build_show_table():
+    """
+    Points from fifteens, pairs and runs for every multiset of up to
+    MAX_SHOW_CARDS ranks, indexed by show_key().
+    """
+    table = np.zeros(RANK_BASE ** MAX_SHOW_CARDS, dtype=np.uint8)
+    for n_cards in range(2, MAX_SHOW_CARDS + 1):
+        for ranks in combinations_with_replacement(range(1, RANK_BASE),
+                                                   n_cards):
+            table[show_key(ranks)] = count_rank_points(ranks)
+    return table
+
+
+register_table("show", build_show_table)
+
+
+# Pegging table: entries pack the next state and the points of a card.
+PEGGING_POINT_BITS = 5
+PEGGING_POINT_MASK = (1 << PEGGING_POINT_BITS) - 1
+PEGGING_INVALID = -1
+MAX_RUN_SPAN = 6  # Runs are at most 7 ranks long: A + 2 + ... + 7 = 28.
+
+
+def pegging_transition(history, rank):
+    """
+    Plays `rank` after the pegging state `history` and returns the points of
+    pairs and runs of the card and the next history. A history is either:
+    1) ("run", ranks): the last card was not paired, ranks are the ranks at
+       the end of the table without repetition, newest last, keeping only
+       those that can still be part of a run.
+    2) ("same", rank, n): the last n cards are of that rank, n >= 2.
+    """
+    if history[0] == "same":
+        _, last, n_same = history
+        if rank == last:
+            n_same = min(n_same + 1, 4)
+            return PAIR_POINTS[n_same], ("same", rank, n_same)
+        ranks = (last,)
+    else:
+        ranks = history[1]
+        if ranks and ranks[-1] == rank:
+            return PAIR_POINTS[2], ("same", rank, 2)
+
+    if rank in ranks:
+        ranks = ranks[ranks.index(rank) + 1:]
+    ranks = ranks + (rank,)
+
+    # Drop the ranks too far from the newest ones to be part of a run.
+    while max(ranks) - min(ranks) > MAX_RUN_SPAN:
+        ranks = ranks[1:]
+
+    run = 0
+    for n_cards in range(3, len(ranks) + 1):
+        if _is_run(ranks[-n_cards:]):
+            run = n_cards
+
+    return run, ("run", ranks)
+
+
+def _history_value(history):
+    """Smallest value of the cards a history stands for."""
+    if history[0] == "same":
+        return history[2] * rank_value(history[1])
+    return sum(rank_value(r) for r in history[1])
+
+
+def build_pegging_table():
+    """
+    Pegging points as a finite automaton over the cards of a count.
+    table[state, rank] packs the next state and the points of pairs and runs
+    of playing a card of `rank` in `state`:
+
+        next_state = table[state, rank] >> PEGGING_POINT_BITS
+        points = table[state, rank] & PEGGING_POINT_MASK
+
+    State 0 is the empty table. Ranks that would bring the cards the state
+    stands for over 31 are PEGGING_INVALID. Fifteens depend on the total and
+    are not included.
+    """
+    start = ("run", ())
+    states = {start: 0}
+    queue = [start]
+    rows = []
+
+    while len(rows) < len(queue):
+        history = queue[len(rows)]
+        row = [PEGGING_INVALID] * RANK_BASE
+        for rank in range(1, RANK_BASE):
+            if _history_value(history) + rank_value(rank) > MAX_TABLE_VALUE:
+                continue
+            points, next_history = pegging_transition(history, rank)
+            if next_history not in states:
+                states[next_history] = len(queue)
+                queue.append(next_history)
+            row[rank] = (states[next_history] << PEGGING_POINT_BITS) | points
+        rows.append(row)
+
+    return np.array(rows, dtype=np.int32)
+
+
+register_table("pegging", build_pegging_table)
+
+
+def show_rank_points(ranks):
+    """
+    Points from fifteens, pairs and runs of the given rank indices. Uses the
+    precomputed show table when possible.
+    """
+    if len(ranks) > MAX_SHOW_CARDS:
+        return count_rank_points(ranks)
+    return int(get_table("show")[show_key(ranks)])
+
+
+if __name__ == "__main__":
+
+    # Tables registered by other modules are in the registry of the package
+    # module, not in that of __main__.
+    from gym_cribbage.envs import discard, tables, winprob  # noqa: F401
+
+    for name in sorted(tables._BUILDERS):
+        tables.build_table(name)
+        print("Built {}".format(tables.table_path(name)))
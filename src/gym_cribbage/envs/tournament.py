@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Tournaments between policies (see simulate.py), played across a process pool.
+
+Each match between two policies is split into jobs of `chunk_size` games,
+played in pairs: both games of a pair share their deals and their first
+dealer seat, with the policies swapping seats, so neither policy gets better
+cards or deals more often. Results are yielded as jobs complete and appended
+to a checkpoint file, from which an interrupted tournament resumes.
+
+Ratings are fitted with a Bradley-Terry model and reported on the Elo scale.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import math
+import os
+
+import numpy as np
+
+from gym_cribbage.envs.simulate import simulate
+
+ELO_SCALE = 400 / math.log(10)
+ELO_MEAN = 1500
+
+# Result of `games` games between players[0] and players[1].
+MatchResult = namedtuple("MatchResult", [
+    "round", "players", "chunk", "games", "wins", "points"
+])
+
+
+class Ratings(object):
+    """
+    Bradley-Terry ratings on the Elo scale:
+    1) The names of the players.
+    2) Their Elo ratings, averaging ELO_MEAN.
+    3) The standard errors of the ratings.
+    """
+
+    def __init__(self, names, elo, stderr):
+        self.names = names
+        self.elo = elo
+        self.stderr = stderr
+
+    def interval(self, z=1.96):
+        """Lower and upper bounds of the confidence intervals."""
+        return self.elo - z * self.stderr, self.elo + z * self.stderr
+
+    def __str__(self):
+        lower, upper = self.interval()
+        rows = ["{:20s} {:7.1f} [{:7.1f}, {:7.1f}]".format(
+            self.names[i], self.elo[i], lower[i], upper[i])
+            for i in np.argsort(-self.elo)]
+        return "\n".join(rows)
+
+
+def bradley_terry(wins, prior=10.0, n_iterations=50):
+    """
+    Fits the Bradley-Terry model P(i beats j) = sigmoid(r_i - r_j).
+
+    Params
+    ======
+        wins: (n, n) array
+            wins[i, j] is the number of games i won against j.
+        prior: float
+            Standard deviation of a Gaussian prior on the ratings, which
+            keeps them finite for players who won or lost every game.
+        n_iterations: int
+            Maximum number of Newton iterations.
+
+    Returns
+    =======
+        ratings, stderr: (n,) arrays, in natural log-odds units.
+    """
+    wins = np.asarray(wins, dtype=np.float64)
+    games = wins + wins.T
+    ratings = np.zeros(len(wins))
+
+    for _ in range(n_iterations):
+        p = 1 / (1 + np.exp(ratings[None, :] - ratings[:, None]))
+        gradient = wins.sum(axis=1) - (games * p).sum(axis=1) \
+            - ratings / prior ** 2
+        weights = games * p * p.T
+        hessian = weights - np.diag(weights.sum(axis=1) + 1 / prior ** 2)
+
+        step = np.linalg.solve(hessian, gradient)
+        ratings -= step
+        if np.abs(step).max() < 1e-10:
+            break
+
+    covariance = np.linalg.inv(-hessian)
+    return ratings - ratings.mean(), np.sqrt(np.diag(covariance))
+
+
+def _play_job(policies, n_games, seed):
+    """
+    Plays n_games (even) games between policies[0] and policies[1] and
+    returns their wins and total points.
+    """
+    wins = [0, 0]
+    points = [0, 0]
+    seeds = np.random.SeedSequence(seed).generate_state(n_games // 2)
+
+    for pair, pair_seed in enumerate(seeds):
+        for swap in (0, 1):
+            seats = [policies[swap], policies[1 - swap]]
+            result = simulate(1, seats, seed=int(pair_seed), dealer=pair % 2)
+            for seat in (0, 1):
+                player = (seat + swap) % 2
+                wins[player] += int(result.winners[0] == seat)
+                points[player] += int(result.scores[0, seat])
+
+    return wins, points
+
+
+class Tournament(object):
+    """
+    Tournament between named policies.
+
+    Params
+    ======
+        policies: dict
+            The policy of each player, by name. With worker processes,
+            policies must be picklable (e.g. module level functions).
+        games_per_match: int
+            Number of games of each match, rounded up to a multiple of
+            chunk_size.
+        schedule: str
+            "round_robin": every player meets every other player once.
+            "swiss": n_rounds rounds, in which players with similar results
+            meet, avoiding rematches.
+        n_rounds: int or None
+            Number of rounds of a Swiss tournament, log2 of the number of
+            players by default.
+        n_workers: int or None
+            Number of worker processes, the number of CPUs by default. With
+            0, games are played in this process.
+        chunk_size: int
+            Number of games per job, even.
+        checkpoint: str or None
+            File (JSON lines) to which results are appended, and from which
+            they are read back when the tournament is run again.
+        seed: int
+            Seed of the deals.
+    """
+
+    def __init__(self, policies, games_per_match=100, schedule="round_robin",
+                 n_rounds=None, n_workers=None, chunk_size=20,
+                 checkpoint=None, seed=0):
+        if schedule not in ("round_robin", "swiss"):
+            raise ValueError("schedule must be 'round_robin' or 'swiss'.")
+        if chunk_size % 2:
+            raise ValueError("chunk_size must be even.")
+
+        self.policies = policies
+        self.names = sorted(policies)
+        self.schedule = schedule
+        self.n_chunks = -(-games_per_match // chunk_size)
+        self.chunk_size = chunk_size
+        self.n_workers = os.cpu_count() if n_workers is None else n_workers
+        self.checkpoint = checkpoint
+        self.seed = seed
+
+        if schedule == "round_robin":
+            self.n_rounds = 1
+        elif n_rounds is None:
+            self.n_rounds = max(1, math.ceil(math.log2(len(self.names))))
+        else:
+            self.n_rounds = n_rounds
+
+        self.results = self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        results = []
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return results
+
+        with open(self.checkpoint) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by the interruption.
+                    continue
+                record["players"] = tuple(record["players"])
+                results.append(MatchResult(**record))
+        return results
+
+    def _save(self, result):
+        if self.checkpoint is None:
+            return
+
+        with open(self.checkpoint, "a") as f:
+            f.write(json.dumps(result._asdict()) + "\n")
+
+    def wins(self, before_round=None):
+        """
+        wins[i, j]: the games self.names[i] won against self.names[j],
+        optionally only in the rounds before `before_round`.
+        """
+        index = {name: i for i, name in enumerate(self.names)}
+        wins = np.zeros((len(self.names), len(self.names)), dtype=np.int64)
+        for result in self.results:
+            if before_round is not None and result.round >= before_round:
+                continue
+            a, b = index[result.players[0]], index[result.players[1]]
+            wins[a, b] += result.wins[0]
+            wins[b, a] += result.wins[1]
+        return wins
+
+    def ratings(self):
+        """Ratings from the results so far."""
+        ratings, stderr = bradley_terry(self.wins())
+        return Ratings(self.names, ELO_MEAN + ELO_SCALE * ratings,
+                       ELO_SCALE * stderr)
+
+    def pairings(self, i_round):
+        """The matches of a round, as pairs of names."""
+        names = self.names
+        if self.schedule == "round_robin":
+            return [(a, b) for i, a in enumerate(names) for b in names[i + 1:]]
+
+        # Swiss: pair players in order of their win rate, each with the best
+        # ranked opponent they have not met. The last player may sit out.
+        wins = self.wins(before_round=i_round)
+        games = wins + wins.T
+        rate = wins.sum(axis=1) / np.maximum(games.sum(axis=1), 1)
+        order = sorted(range(len(names)), key=lambda i: (-rate[i], names[i]))
+
+        pairs = []
+        unpaired = list(order)
+        while len(unpaired) > 1:
+            a = unpaired.pop(0)
+            b = next((j for j in unpaired if games[a, j] == 0), unpaired[0])
+            unpaired.remove(b)
+            pairs.append((names[a], names[b]))
+        return pairs
+
+    def _job_seed(self, i_round, players, chunk):
+        index = [self.names.index(p) for p in players]
+        return [self.seed, i_round] + index + [chunk]
+
+    def run(self):
+        """
+        Plays the games not found in the checkpoint, yielding each
+        MatchResult as it completes.
+        """
+        done = {(r.round, r.players, r.chunk) for r in self.results}
+        executor = None
+        if self.n_workers > 0:
+            executor = ProcessPoolExecutor(self.n_workers)
+
+        try:
+            for i_round in range(self.n_rounds):
+                jobs = [(i_round, players, chunk)
+                        for players in self.pairings(i_round)
+                        for chunk in range(self.n_chunks)
+                        if (i_round, players, chunk) not in done]
+
+                for job, (wins, points) in self._play(executor, jobs):
+                    result = MatchResult(*job, games=self.chunk_size,
+                                         wins=wins, points=points)
+                    self.results.append(result)
+                    self._save(result)
+                    yield result
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _play(self, executor, jobs):
+        def args(job):
+            i_round, players, chunk = job
+            return ([self.policies[p] for p in players], self.chunk_size,
+                    self._job_seed(i_round, players, chunk))
+
+        if executor is None:
+            for job in jobs:
+                yield job, _play_job(*args(job))
+            return
+
+        futures = {executor.submit(_play_job, *args(job)): job
+                   for job in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
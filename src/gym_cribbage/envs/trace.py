@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Structured tracing of the events of a CribbageEnv.
+
+A sink is any callable taking an Event. It is installed with
+CribbageEnv.set_trace(sink) and removed with CribbageEnv.set_trace(None).
+Without a sink, the environment only checks that none is installed, so
+tracing costs nothing. Events are plain tuples of ints, and nothing is
+formatted unless the sink does it, so tracing can also be turned on for a
+sample of the games, e.g. by calling set_trace() before some of the resets.
+"""
+
+from collections import deque, namedtuple
+import logging
+
+# Kinds of events.
+NEW_HAND = 0    # player: the dealer.
+DEAL = 1        # player receives card.
+DISCARD = 2     # player throws card to the crib.
+STARTER = 3     # card is the starter, points for his heels go to player.
+PLAY = 4        # player plays card for points, value is the table value.
+GO = 5          # player gets points for the last card, value as for PLAY.
+SHOW = 6        # player scores points with their hand.
+CRIB = 7        # player scores points with the crib.
+GAME_OVER = 8   # player wins with value points.
+
+EVENT_NAMES = ("new_hand", "deal", "discard", "starter", "play", "go", "show",
+               "crib", "game_over")
+
+# Card ids are -1 for events without a card.
+Event = namedtuple("Event", ["kind", "player", "card", "points", "value"])
+
+
+class RingBuffer(object):
+    """
+    Sink keeping the last `capacity` events. Older events are dropped. With
+    capacity=None, every event is kept.
+    """
+
+    def __init__(self, capacity=4096):
+        self.events = deque(maxlen=capacity)
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def clear(self):
+        self.events.clear()
+
+
+class LoggingSink(object):
+    """
+    Sink writing events to a logger, at the DEBUG level by default. This is
+    what CribbageEnv(verbose=True) installs.
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger("gym_cribbage")
+        self.level = level
+
+    def __call__(self, event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, format_event(event))
+
+
+def format_event(event):
+    """Human readable description of an event."""
+    from gym_cribbage.envs.cribbage_env import Card
+
+    card = Card.from_idx(event.card) if event.card >= 0 else "-"
+    return "{:9s} player={} card={} points={} value={}".format(
+        EVENT_NAMES[event.kind], event.player, card, event.points,
+        event.value)
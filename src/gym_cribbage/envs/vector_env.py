@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+Steps many games of Cribbage in lockstep. Follows exactly the rules of
+CribbageEnv, but the games are held in struct-of-arrays form and cards are
+integer ids (see core.py): hands, played cards and cribs are bitmasks.
+"""
+
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.batch_scoring import (
+    RANK_OF,
+    VALUE_OF,
+    evaluate_cards_batch,
+)
+from gym_cribbage.envs.core import MAX_TABLE_VALUE, N_CARDS
+from gym_cribbage.envs.cribbage_env import MAX_ROUND_VALUE
+from gym_cribbage.envs.observation import MAX_TABLE_CARDS
+
+PAIR_POINTS = np.array(core.PAIR_POINTS, dtype=np.int64)
+CARD_BITS = np.left_shift(np.int64(1), np.arange(N_CARDS, dtype=np.int64))
+
+
+def unpack(masks):
+    """Bitmasks (...,) to boolean arrays (..., 52)."""
+    masks = np.ascontiguousarray(masks, dtype="<i8")
+    bits = np.unpackbits(
+        masks.view(np.uint8).reshape(masks.shape + (8,)),
+        axis=-1,
+        bitorder="little"
+    )
+    return bits[..., :N_CARDS].astype(bool)
+
+
+def pack(bits):
+    """Boolean arrays (..., 52) to bitmasks (...,)."""
+    return (bits * CARD_BITS).sum(axis=-1)
+
+
+def popcount(masks):
+    return unpack(masks).sum(axis=-1)
+
+
+def mask_to_ids(masks, n_cards):
+    """Bitmasks (N,) holding n_cards cards each to card ids (N, n_cards)."""
+    return np.nonzero(unpack(masks))[1].reshape(len(masks), n_cards)
+
+
+class VectorState(object):
+    """
+    Batched equivalent of State. Every field has the number of games as
+    first dimension:
+    1) The playable cards of the current player, as a bitmask.
+    2) The ID of the current player.
+    3) The ID of the player who recieves this turn's reward.
+    4) The phase of the game {0: the deal, 1: the play, 2: the show}.
+    5) The scores of the current player and of its opponents, in seat order.
+    """
+
+    def __init__(self, hand, hand_id, reward_id, phase,
+                 player_score, opponent_score):
+        self.hand = hand
+        self.hand_id = hand_id
+        self.reward_id = reward_id
+        self.phase = phase
+        self.player_score = player_score
+        self.opponent_score = opponent_score
+
+
+class CribbageVectorEnv(object):
+    """
+    Plays `n_envs` games of Cribbage at once. step() takes one card id per
+    game and advances every game by one turn. Finished games are reset
+    automatically.
+    """
+
+    def __init__(self, n_envs, n_players=2, seed=None):
+        super(CribbageVectorEnv, self).__init__()
+
+        self.n_envs = n_envs
+        self.n_players = n_players
+        if self.n_players < 2 or self.n_players > 4:
+            raise ValueError("Cribbage is played by 2-4 players.")
+
+        self._cards_per_hand = core.CARDS_PER_HAND[self.n_players]
+
+        # Number of cards in each crib.
+        self._crib_size = (self._cards_per_hand - 4) * self.n_players
+
+        self.rng = np.random.default_rng(seed)
+
+        # Seats of the opponents of each player, in seat order.
+        self._opponents = np.array([
+            [q for q in range(n_players) if q != p] for p in range(n_players)
+        ])
+
+        n, p = n_envs, n_players
+        self.scores = np.zeros((n, p), dtype=np.int64)
+        self.hands = np.zeros((n, p), dtype=np.int64)
+        self.played = np.zeros((n, p), dtype=np.int64)
+        self.crib = np.zeros(n, dtype=np.int64)
+        self.deck = np.zeros((n, N_CARDS), dtype=np.int8)
+        self.starter = np.zeros(n, dtype=np.int64)
+        self.table = np.zeros((n, MAX_TABLE_CARDS), dtype=np.int64)
+        self.table_len = np.zeros(n, dtype=np.int64)
+        self.table_value = np.zeros(n, dtype=np.int64)
+        self.dealer = np.zeros(n, dtype=np.int64)
+        self.player = np.zeros(n, dtype=np.int64)
+        self.last_player = np.zeros(n, dtype=np.int64)
+        self.phase = np.zeros(n, dtype=np.int64)
+
+        self.initialized = False
+
+    def reset(self, dealer=None):
+        """
+        Starts a new game in every environment. Returns the state of every
+        game and the current player ids.
+        """
+        games = np.arange(self.n_envs)
+        self._reset_games(games, dealer)
+        self.last_player[:] = self.dealer
+        self.initialized = True
+
+        self.state = self._get_state(self.dealer)
+        return(self.state, self.player.copy())
+
+    def step(self, actions, games=None):
+        """
+        Plays one card per game.
+
+        Params
+        ======
+            actions: int array (n_envs,)
+                The id of the card played by the current player of each
+                game. Ignored for games in The Show.
+            games: int array or None
+                Only steps these games, the others are left as they are and
+                get no reward. All games by default.
+
+        Returns
+        =======
+            state, rewards, dones, players: VectorState, int array,
+            bool array, int array
+            rewards go to state.reward_id. Games that are done are reset, so
+            state already describes the next game for them.
+        """
+        if not self.initialized:
+            raise Exception(
+                "Need to CribbageVectorEnv.reset() before first step.")
+
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.zeros(self.n_envs, dtype=np.int64)
+        reward_id = np.zeros(self.n_envs, dtype=np.int64)
+        new_hand = np.zeros(self.n_envs, dtype=bool)
+
+        stepped = np.ones(self.n_envs, dtype=bool)
+        if games is not None:
+            stepped[:] = False
+            stepped[games] = True
+
+        deal, play, show = [np.flatnonzero(stepped & (self.phase == phase))
+                            for phase in range(3)]
+        self._check_actions(np.concatenate([deal, play]), actions)
+
+        if len(deal):
+            self._step_deal(deal, actions[deal], rewards, reward_id)
+        if len(play):
+            self._step_play(play, actions[play], rewards, reward_id)
+        if len(show):
+            self._step_show(show, rewards, reward_id, new_hand)
+
+        dones = stepped & (self.scores >= MAX_ROUND_VALUE).any(axis=1)
+
+        if dones.any():
+            self._reset_games(np.flatnonzero(dones))
+
+        new_hand &= ~dones
+        if new_hand.any():
+            games = np.flatnonzero(new_hand)
+            next_dealer = (self.dealer[games] + 1) % self.n_players
+            self._reset_hands(games, next_dealer)
+
+        self.state = self._get_state(reward_id)
+        return(self.state, rewards, dones, self.player.copy())
+
+    def playable(self, games=None):
+        """
+        Bitmasks of the cards the current player of each game can play.
+        Empty during The Show.
+        """
+        if games is None:
+            games = np.arange(self.n_envs)
+
+        hands = self.hands[games, self.player[games]]
+        limit = MAX_TABLE_VALUE - self.table_value[games]
+        bits = unpack(hands) & (VALUE_OF[None, :] <= limit[:, None])
+        masks = pack(bits)
+        masks[self.phase[games] == 2] = 0
+        return masks
+
+    def _check_actions(self, games, actions):
+        legal = self.playable(games)
+        played = CARD_BITS[np.clip(actions[games], 0, N_CARDS - 1)]
+        illegal = ((actions[games] < 0) | (actions[games] >= N_CARDS) |
+                   (legal & played == 0))
+        if illegal.any():
+            game = games[np.argmax(illegal)]
+            raise ValueError(
+                "Card {} cannot be played in game {}.".format(
+                    actions[game], game)
+            )
+
+    def _step_deal(self, games, cards, rewards, reward_id):
+        """The Deal: the current player discards a card to the crib."""
+        player = self.player[games]
+        bits = CARD_BITS[cards]
+
+        self.hands[games, player] &= ~bits
+        self.crib[games] |= bits
+        self.last_player[games] = player
+
+        dealer = self.dealer[games]
+        n_cards = popcount(self.hands[games]).sum(axis=1)
+        complete = n_cards == 4 * self.n_players
+
+        # The crib is complete: draw the starter, two for his heels.
+        starter = self.deck[games, self._cards_per_hand * self.n_players]
+        self.starter[games] = np.where(complete, starter, self.starter[games])
+        heels = complete & (RANK_OF[starter] == core.JACK)
+        rewards[games] = 2 * heels
+        self.phase[games] = np.where(complete, 1, 0)
+
+        # The Play starts from the left of the dealer.
+        next_player = np.where(complete, dealer, player)
+        self.player[games] = (next_player + 1) % self.n_players
+
+        # Reward always goes to the dealer during the deal.
+        self.scores[games, dealer] += rewards[games]
+        reward_id[games] = dealer
+
+    def _step_play(self, games, cards, rewards, reward_id):
+        """The Play: the current player plays a card on the table."""
+        player = self.player[games]
+        bits = CARD_BITS[cards]
+
+        self.hands[games, player] &= ~bits
+        self.played[games, player] |= bits
+        self.table[games, self.table_len[games]] = cards
+        self.table_len[games] += 1
+        self.table_value[games] += VALUE_OF[cards]
+        reward = self._evaluate_play(games)
+
+        counts = self._count_playable_cards(games)
+        self.last_player[games] = player
+
+        # Go! If no one else can play, give this player an extra 1 or 2
+        # points.
+        go = counts.sum(axis=1) == 0
+        last_card = np.where(self.table_value[games] == MAX_TABLE_VALUE, 2, 1)
+        reward += go * last_card
+
+        remaining = popcount(self.hands[games]).sum(axis=1)
+
+        # Move onto The Show.
+        show = go & (remaining == 0)
+        self.phase[games[show]] = 2
+        next_player = np.where(show, self.dealer[games], player)
+        self.player[games] = (next_player + 1) % self.n_players
+
+        # Reset the table and playable cards.
+        reset = go & (remaining > 0)
+        if reset.any():
+            self.table_len[games[reset]] = 0
+            self.table_value[games[reset]] = 0
+            counts[reset] = self._count_playable_cards(games[reset])
+
+        # Skip to the next player who has a playable hand.
+        self._next_avail_player(games[~show], counts[~show])
+
+        self.scores[games, player] += reward
+        rewards[games] = reward
+        reward_id[games] = player
+
+    def _step_show(self, games, rewards, reward_id, new_hand):
+        """The Show: the current player counts their hand (and crib)."""
+        player = self.player[games]
+        dealer = self.dealer[games]
+        starter = self.starter[games]
+
+        hands = mask_to_ids(self.played[games, player], 4)
+        reward = evaluate_cards_batch(hands, starter)
+
+        has_crib = player == dealer
+        if has_crib.any():
+            cribs = mask_to_ids(self.crib[games[has_crib]], self._crib_size)
+            reward[has_crib] += evaluate_cards_batch(
+                cribs, starter[has_crib], is_crib=True)
+
+        # Went around the circle once. This hand is over.
+        new_hand[games] = has_crib
+
+        self.last_player[games] = player
+        self.player[games] = (player + 1) % self.n_players
+        self.scores[games, player] += reward
+        rewards[games] = reward
+        reward_id[games] = player
+
+    def _evaluate_play(self, games):
+        """
+        Points for the last card played on the table of each game, see
+        evaluate_table.
+        """
+        table = self.table[games]
+        n_cards = self.table_len[games]
+        rows = np.arange(len(games))
+
+        points = 2 * (self.table_value[games] == 15)
+
+        # Pair points: cards of the same rank at the end of the table.
+        last = RANK_OF[table[rows, n_cards - 1]]
+        n_same = np.ones(len(games), dtype=np.int64)
+        same = np.ones(len(games), dtype=bool)
+        for k in range(2, 5):
+            rank = RANK_OF[table[rows, np.maximum(n_cards - k, 0)]]
+            same &= (n_cards >= k) & (rank == last)
+            n_same += same
+        points += PAIR_POINTS[n_same]
+
+        # Run points: walk back until a rank repeats, keep the longest run.
+        run = np.zeros(len(games), dtype=np.int64)
+        rank_mask = np.zeros(len(games), dtype=np.int64)
+        distinct = np.ones(len(games), dtype=bool)
+        for k in range(1, n_cards.max() + 1):
+            rank = RANK_OF[table[rows, np.maximum(n_cards - k, 0)]]
+            bit = np.left_shift(1, rank)
+            distinct &= (n_cards >= k) & (rank_mask & bit == 0)
+            rank_mask = np.where(distinct, rank_mask | bit, rank_mask)
+            if k >= 3:
+                low = rank_mask & -rank_mask
+                is_run = distinct & ((rank_mask + low) & rank_mask == 0)
+                run = np.where(is_run, k, run)
+        points += run
+
+        return points
+
+    def _count_playable_cards(self, games):
+        """Number of playable cards in each player's hand, (n_games, n)."""
+        limit = MAX_TABLE_VALUE - self.table_value[games]
+        bits = unpack(self.hands[games])
+        playable = bits & (VALUE_OF[None, None, :] <= limit[:, None, None])
+        return playable.sum(axis=2)
+
+    def _next_avail_player(self, games, counts):
+        """Moves to the next player who can play, if anybody can."""
+        rows = np.arange(len(games))
+        can_play = counts.sum(axis=1) > 0
+        for _ in range(self.n_players):
+            skip = can_play & (counts[rows, self.player[games]] == 0)
+            if not skip.any():
+                break
+            self.player[games] = (self.player[games] + skip) % self.n_players
+
+    def _reset_games(self, games, dealer=None):
+        """Clears the scoreboard of the games and deals a new hand."""
+        self.scores[games] = 0
+
+        if dealer is None:
+            dealer = self.rng.integers(self.n_players, size=len(games))
+        self._reset_hands(games, dealer)
+
+    def _reset_hands(self, games, dealer):
+        """Shuffles the decks of the games and deals new hands."""
+        deck = self.rng.random((len(games), N_CARDS)).argsort(axis=1)
+        self.deck[games] = deck
+
+        n_dealt = self._cards_per_hand * self.n_players
+        hands = deck[:, :n_dealt].reshape(
+            len(games), self.n_players, self._cards_per_hand)
+        self.hands[games] = CARD_BITS[hands].sum(axis=2)
+
+        self.played[games] = 0
+        self.crib[games] = 0
+        self.table_len[games] = 0
+        self.table_value[games] = 0
+        self.dealer[games] = dealer
+        self.player[games] = dealer
+        self.phase[games] = 0
+
+    def _get_state(self, reward_id):
+        games = np.arange(self.n_envs)
+        player = self.player
+
+        return VectorState(
+            self.playable(),
+            player.copy(),
+            np.array(reward_id, copy=True),
+            self.phase.copy(),
+            self.scores[games, player],
+            self.scores[games[:, None], self._opponents[player]]
+        )
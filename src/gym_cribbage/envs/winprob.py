@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Probability of winning a game of 2 players from any board position.
+
+A hand is scored in stages: the dealer's heels, The Play, the pone's hand and
+the dealer's hand and crib. The points of each stage are sampled from hands
+played by baseline bots (see bots.py). Stages are taken as independent, except
+for The Play where the points of both players are kept together, and a player
+wins as soon as they reach MAX_ROUND_VALUE. When both reach it during The
+Play, the pone, who plays first, is taken to win.
+
+P(win) at the start of a hand is found by dynamic programming over every
+(score, opponent score) pair at once: every hand scores at least one point,
+so iterating the expectation over a hand converges exactly in at most
+2 * MAX_ROUND_VALUE passes.
+
+The table is indexed by [is_dealer, score, opponent score], with scores
+clipped to MAX_ROUND_VALUE, and built on first use like the other tables.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.bots import EVBot
+from gym_cribbage.envs.cribbage_env import MAX_ROUND_VALUE
+from gym_cribbage.envs.pegging import PeggingState
+from gym_cribbage.envs.simulate import Turn, _play_hand
+from gym_cribbage.envs.tables import get_table, register_table
+
+# Columns of the points sampled for each hand.
+HEELS, PONE_PLAY, DEALER_PLAY, PONE_SHOW, DEALER_SHOW = range(5)
+
+# Number of hands sampled to build the table, and per worker job.
+WIN_PROB_HANDS = 10000
+WIN_PROB_CHUNK = 1000
+
+
+def sample_hands(n_hands, policies=None, seed=None):
+    """
+    Plays n_hands hands of 2 players, player 0 dealing.
+
+    Params
+    ======
+        n_hands: int
+        policies: list of 2 callables or None
+            See simulate.py. Two EVBots if None.
+        seed: int, SeedSequence or None
+
+    Returns
+    =======
+        points: int array (n_hands, 5)
+            The dealer's heels, the points of the pone and the dealer during
+            The Play, the pone's show and the dealer's show and crib.
+    """
+    if policies is None:
+        policies = [EVBot()] * 2
+
+    rng = np.random.default_rng(seed)
+    order = np.arange(core.N_CARDS)
+    turn = Turn(2)
+    turn.scores = [0, 0]
+    pegging = PeggingState()
+
+    points = np.zeros((n_hands, 5), dtype=np.int64)
+    columns = {(0, 0): HEELS, (1, 1): PONE_PLAY, (0, 1): DEALER_PLAY,
+               (1, 2): PONE_SHOW, (0, 2): DEALER_SHOW}
+
+    for i in range(n_hands):
+        row = points[i]
+
+        def score(player, phase, n_points):
+            row[columns[player, phase]] += n_points
+            return False
+
+        rng.shuffle(order)
+        _play_hand(policies, order.tolist(), 0, score, turn, pegging)
+
+    return points
+
+
+def _outcomes(points):
+    """
+    Distinct (dealer points, pone points) of a stage, with their
+    probabilities.
+    """
+    outcomes, counts = np.unique(points, axis=0, return_counts=True)
+    return outcomes, counts / float(len(points))
+
+
+def _with_boundary(values):
+    """
+    Sets the values of finished games, from the dealer's side: won when the
+    dealer reached MAX_ROUND_VALUE, lost when the pone did, lost when both
+    did (during The Play).
+    """
+    values[-1, :] = 1
+    values[:, -1] = 0
+    return values
+
+
+def _expect(values, outcomes, probabilities):
+    """Values before a stage, from the values after it."""
+    shifted = np.minimum(np.arange(MAX_ROUND_VALUE + 1)[:, None] +
+                         np.arange(outcomes.max() + 1), MAX_ROUND_VALUE)
+    expected = np.zeros_like(values)
+    for (dealer, pone), p in zip(outcomes, probabilities):
+        expected += p * values[np.ix_(shifted[:, dealer], shifted[:, pone])]
+    return _with_boundary(expected)
+
+
+def win_probabilities(points):
+    """
+    P(win) from every board position at the start of a hand.
+
+    Params
+    ======
+        points: int array (n_hands, 5)
+            Points of sampled hands, see sample_hands().
+
+    Returns
+    =======
+        win_prob: float array (2, MAX_ROUND_VALUE + 1, MAX_ROUND_VALUE + 1)
+            P(win) by [is_dealer, score, opponent score].
+    """
+    zeros = np.zeros(len(points), dtype=np.int64)
+    stages = [
+        _outcomes(np.stack([points[:, HEELS], zeros], axis=1)),
+        _outcomes(points[:, [DEALER_PLAY, PONE_PLAY]]),
+        _outcomes(np.stack([zeros, points[:, PONE_SHOW]], axis=1)),
+        _outcomes(np.stack([points[:, DEALER_SHOW], zeros], axis=1)),
+    ]
+
+    size = MAX_ROUND_VALUE + 1
+    dealer = _with_boundary(np.zeros((size, size)))
+    for _ in range(2 * MAX_ROUND_VALUE + 1):
+        # The pone deals the next hand.
+        values = _with_boundary(1 - dealer.T)
+        for outcomes, probabilities in reversed(stages):
+            values = _expect(values, outcomes, probabilities)
+
+        if np.array_equal(values, dealer):
+            break
+        dealer = values
+
+    return np.stack([_with_boundary(1 - dealer.T), dealer])
+
+
+def build_win_prob_table(n_hands=WIN_PROB_HANDS, seed=0, n_workers=None):
+    """
+    The win probability table, from n_hands hands played by EVBots across a
+    process pool.
+    """
+    n_chunks = -(-n_hands // WIN_PROB_CHUNK)
+    sizes = [WIN_PROB_CHUNK] * (n_chunks - 1) + \
+        [n_hands - WIN_PROB_CHUNK * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+
+    with ProcessPoolExecutor(n_workers) as executor:
+        points = list(executor.map(sample_hands, sizes, [None] * n_chunks,
+                                   seeds))
+
+    return win_probabilities(np.concatenate(points)).astype(np.float32)
+
+
+register_table("win_prob", build_win_prob_table)
+
+
+def win_prob_table():
+    """
+    The win probability table (2, MAX_ROUND_VALUE + 1, MAX_ROUND_VALUE + 1),
+    indexed by [is_dealer, score, opponent score].
+    """
+    return get_table("win_prob")
+
+
+def win_probability(score, opponent_score, is_dealer):
+    """P(win) at the start of a hand, from the win probability table."""
+    return float(win_prob_table()[
+        int(is_dealer),
+        min(score, MAX_ROUND_VALUE),
+        min(opponent_score, MAX_ROUND_VALUE)
+    ])
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs.async_vector_env import AsyncCribbageVectorEnv
+from gym_cribbage.envs.vector_env import CribbageVectorEnv
+
+
+class AsyncCribbageVectorEnvTest(unittest.TestCase):
+
+    def test_matches_vector_env(self):
+        seeds = np.random.SeedSequence(0).spawn(2)
+        shards = [CribbageVectorEnv(3, seed=seed) for seed in seeds]
+
+        with AsyncCribbageVectorEnv(6, n_workers=2, seed=0) as env:
+            state, players = env.reset()
+            expected = [shard.reset()[1] for shard in shards]
+            np.testing.assert_array_equal(players, np.concatenate(expected))
+
+            for _ in range(300):
+                actions = np.argmax(env.action_mask, axis=1)
+                state, rewards, dones, players = env.step(actions)
+
+                results = [shard.step(a) for shard, a in
+                           zip(shards, np.split(actions, 2))]
+                for i, result in enumerate(zip(*results)):
+                    if i == 0:
+                        continue
+                    np.testing.assert_array_equal(
+                        (state, rewards, dones, players)[i],
+                        np.concatenate(result)
+                    )
+                np.testing.assert_array_equal(
+                    state.hand,
+                    np.concatenate([r[0].hand for r in results])
+                )
+
+    def test_illegal_action(self):
+        env = AsyncCribbageVectorEnv(4, n_workers=2, seed=0)
+        try:
+            env.reset()
+            actions = np.argmin(env.action_mask, axis=1)
+            with self.assertRaises(ValueError):
+                env.step(actions)
+        finally:
+            env.close()
+        self.assertTrue(env.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
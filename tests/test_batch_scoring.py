@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs import batch_scoring, core
+from gym_cribbage.envs.batch_scoring import evaluate_cards_batch
+
+
+class BatchScoringTest(unittest.TestCase):
+
+    def _random_hands(self, n_hands, n_cards, seed=0):
+        rng = np.random.default_rng(seed)
+        return np.argsort(rng.random((n_hands, 52)), axis=1)[:, :n_cards]
+
+    def test_matches_evaluate_cards(self):
+        cards = self._random_hands(3000, 5)
+        hands, starters = cards[:, :4], cards[:, 4]
+        is_crib = np.arange(len(cards)) % 2 == 0
+
+        points = evaluate_cards_batch(hands, starters, is_crib)
+        expected = [
+            core.evaluate_cards(list(h), int(s), bool(c))
+            for h, s, c in zip(hands, starters, is_crib)
+        ]
+        np.testing.assert_array_equal(points, expected)
+
+    def test_best_hand(self):
+        # 5♤ 5♡ 5♧ J♢ with the 5♢ as starter.
+        hand = [core.card_id(5, s) for s in range(3)] + [core.card_id(11, 3)]
+        points = evaluate_cards_batch([hand], [core.card_id(5, 3)])
+        self.assertEqual(points.tolist(), [29])
+
+    def test_without_starter_and_small_hands(self):
+        for n_cards in (2, 3, 5):
+            hands = self._random_hands(500, n_cards, seed=n_cards)
+            np.testing.assert_array_equal(
+                evaluate_cards_batch(hands, is_crib=True),
+                [core.evaluate_cards(list(h), is_crib=True) for h in hands]
+            )
+
+    def test_chunks(self):
+        cards = self._random_hands(1000, 5)
+        expected = evaluate_cards_batch(cards[:, :4], cards[:, 4])
+
+        chunk_size = batch_scoring.CHUNK_SIZE
+        try:
+            batch_scoring.CHUNK_SIZE = 64
+            points = evaluate_cards_batch(cards[:, :4], cards[:, 4])
+        finally:
+            batch_scoring.CHUNK_SIZE = chunk_size
+        np.testing.assert_array_equal(points, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
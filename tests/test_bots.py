@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+import unittest
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.bots import EVBot, GreedyBot, RandomBot
+from gym_cribbage.envs.discard import discard_ev
+from gym_cribbage.envs.simulate import Turn, simulate
+
+
+def play_turn(hand, table, n_players=2):
+    turn = Turn(n_players)
+    turn.phase = 1
+    turn.hand = hand
+    turn.table = table
+    turn.table_value = core.table_value(table)
+    turn.playable = core.playable(hand, turn.table_value)
+    return turn
+
+
+class BotsTest(unittest.TestCase):
+
+    def test_games(self):
+        for bots in ([RandomBot(0), EVBot()],
+                     [RandomBot(0), GreedyBot(), EVBot()],
+                     [GreedyBot(), RandomBot(0), EVBot(), RandomBot(1)]):
+            result = simulate(2, bots, seed=0)
+            self.assertTrue((result.scores.max(axis=1) >= 121).all())
+
+    def test_greedy_beats_random(self):
+        result = simulate(100, [GreedyBot(), RandomBot(0)], seed=0)
+        self.assertGreater(result.win_rates[0], 0.6)
+
+    def test_greedy_play(self):
+        bot = GreedyBot()
+        five, two = core.card_id(5, 0), core.card_id(2, 0)
+        ten, king = core.card_id(10, 1), core.card_id(13, 1)
+
+        # Takes the fifteen.
+        turn = play_turn([five, two], [ten])
+        self.assertEqual(bot(turn), five)
+
+        # Does not leave 5 on a new count.
+        turn = play_turn([five, two], [])
+        self.assertEqual(bot(turn), two)
+
+        # Takes 31.
+        turn = play_turn([king, two], [ten, ten + 13, core.card_id(1, 0)])
+        self.assertEqual(bot(turn), king)
+
+    def test_ev_discard(self):
+        hand = [core.card_id(r, s) for r, s in
+                [(5, 0), (5, 1), (11, 1), (4, 2), (6, 3), (13, 0)]]
+        best = discard_ev(hand, is_dealer=False, crib_table=True).best
+
+        bot = EVBot()
+        turn = Turn(2)
+        turn.player, turn.dealer = 1, 0
+        turn.hand = turn.playable = list(hand)
+
+        discarded = []
+        for _ in range(2):
+            card = bot(turn)
+            turn.hand.remove(card)
+            discarded.append(card)
+        self.assertEqual(sorted(discarded), sorted(best))
+
+    def test_picklable(self):
+        for bot in (RandomBot(0), GreedyBot(), EVBot()):
+            self.assertIsInstance(pickle.loads(pickle.dumps(bot)), type(bot))
+
+
+if __name__ == '__main__':
+    unittest.main()
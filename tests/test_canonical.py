@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from itertools import permutations
+import random
+import unittest
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.canonical import (
+    canonicalize,
+    invert_permutation,
+    permute_suits,
+    suit_canonical,
+)
+
+
+class CanonicalTest(unittest.TestCase):
+
+    def test_invariant(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            cards = rng.sample(range(core.N_CARDS), 10)
+            hand, starter, crib = cards[:4], cards[4], cards[5:9]
+            canonical, _ = canonicalize(hand, starter, crib)
+
+            for permutation in permutations(range(core.N_SUITS)):
+                permuted = canonicalize(
+                    [permute_suits(c, permutation) for c in hand],
+                    permute_suits(starter, permutation),
+                    [permute_suits(c, permutation) for c in crib])
+                self.assertEqual(permuted[0], canonical)
+
+    def test_points_unchanged(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            cards = rng.sample(range(core.N_CARDS), 5)
+            hand, starter = cards[:4], cards[4]
+            (c_hand, c_starter), _ = canonicalize(hand, starter)
+            for is_crib in (False, True):
+                self.assertEqual(
+                    core.evaluate_cards(list(c_hand), c_starter, is_crib),
+                    core.evaluate_cards(hand, starter, is_crib))
+
+    def test_permutation(self):
+        hand = [core.card_id(r, s)
+                for r, s in [(1, 3), (5, 3), (5, 1), (11, 2)]]
+        canonical, permutation = suit_canonical(hand)
+        self.assertEqual(
+            canonical, tuple(sorted(permute_suits(c, permutation)
+                                    for c in hand)))
+
+        inverse = invert_permutation(permutation)
+        self.assertEqual(
+            sorted(permute_suits(c, inverse) for c in canonical),
+            sorted(hand))
+
+        # Suits are ordered by their rank masks, the jack's first.
+        self.assertEqual(permutation, (3, 2, 0, 1))
+
+    def test_missing_groups(self):
+        canonical, _ = canonicalize([core.card_id(2, 1)], None)
+        self.assertEqual(canonical, ((core.card_id(2, 0),), None))
+
+    def test_classes(self):
+        # 2-card discards fall in 91 + 78 classes.
+        classes = set(suit_canonical(d)[0]
+                      for d in permutations(range(core.N_CARDS), 2))
+        self.assertEqual(len(classes), 169)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+from itertools import product
+
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.cribbage_env import (
+    Card,
+    RANKS,
+    SUITS,
+    Stack,
+    evaluate_table,
+    is_sequence,
+)
+
+
+def evaluate_table_reference(cards):
+    """Scores the last card on the table by checking every suffix."""
+    points = 0
+    if sum(c.value for c in cards) == 15:
+        points += 2
+
+    n_same = 1
+    for card in reversed(cards[-4:-1]):
+        if card.rank != cards[-1].rank:
+            break
+        n_same += 1
+    points += (0, 0, 2, 6, 12)[n_same]
+
+    for i in range(len(cards), 2, -1):
+        if is_sequence(cards[-i:]):
+            points += i
+            break
+
+    return points
+
+
+class CoreTest(unittest.TestCase):
+
+    def test_card_ids(self):
+        for idx in range(core.N_CARDS):
+            card = Card.from_idx(idx)
+            self.assertEqual(card.idx, idx)
+            self.assertEqual(int(np.argmax(card.state)), idx)
+            self.assertEqual(core.RANK_OF[idx], card.rank_value)
+            self.assertEqual(core.VALUE_OF[idx], card.value)
+
+    def test_masks(self):
+        cards = [51, 0, 13, 7]
+        mask = core.mask_of(cards)
+        self.assertEqual(core.ids_of(mask), sorted(cards))
+        self.assertEqual(core.popcount(mask), 4)
+        self.assertEqual(Stack.from_ids(cards).mask, mask)
+        self.assertEqual(Stack.from_ids(cards).ids, cards)
+
+    def test_evaluate_table_matches_reference(self):
+        rng = random.Random(0)
+        deck = [Card(rank, suit) for rank, suit in product(RANKS, SUITS)]
+        for _ in range(5000):
+            rng.shuffle(deck)
+            table = []
+            for card in deck:
+                if sum(c.value for c in table) + card.value > 31:
+                    break
+                table.append(card)
+                self.assertEqual(evaluate_table(table),
+                                 evaluate_table_reference(table))
+
+    def test_playable(self):
+        # A four and a king of spades.
+        cards = [core.card_id(4, 0), core.card_id(13, 0)]
+        self.assertEqual(core.playable(cards, 20), cards)
+        self.assertEqual(core.playable(cards, 25), cards[:1])
+        self.assertEqual(core.playable(cards, 28), [])
+
+    def test_is_sequence(self):
+        self.assertTrue(core.is_sequence([core.card_id(r, r % 4)
+                                          for r in (7, 5, 6)]))
+        self.assertFalse(core.is_sequence([core.card_id(r, 0)
+                                           for r in (5, 5, 6)]))
+        self.assertFalse(core.is_sequence([core.card_id(r, 0)
+                                           for r in (5, 7, 8)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
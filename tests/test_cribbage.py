@@ -4,10 +4,14 @@
 # @Last Modified by:   Alexis Tremblay
 # @Last Modified time: 2019-03-09 14:07:20
 
+import copy
+import pickle
 import unittest
 import random
 import numpy as np
 
+from gym_cribbage.envs import core
+from gym_cribbage.envs.core import ACTION_NOOP
 from gym_cribbage.envs.cribbage_env import (
     is_sequence,
     Card,
@@ -18,6 +22,7 @@ from gym_cribbage.envs.cribbage_env import (
     evaluate_table,
     card_to_idx,
     CribbageEnv,
+    Deck,
     stack_to_idx
 )
 
@@ -317,6 +322,174 @@ class CribbageEnvTest(unittest.TestCase):
     #     self.assertEqual(cribbage.past_plays[0].suit, SUITS[2])
     #     self.assertEqual(cribbage.past_plays[0].rank, RANKS[0])
 
+    def test_deck(self):
+        deck = Deck(rng=np.random.default_rng(0))
+        self.assertEqual(len(deck), 52)
+
+        card = deck.cards[10]
+        smaller = deck.remove(card)
+        self.assertEqual(len(smaller), 51)
+        self.assertEqual(len(deck), 52)
+        self.assertNotIn(card, smaller.cards)
+
+        first = deck.cards[0]
+        deck.remove_(card)
+        self.assertEqual(deck.deal(player=1), first)
+        self.assertEqual(len(deck), 50)
+
+        deck.shuffle()
+        self.assertEqual(len(deck), 52)
+        self.assertEqual(len(set(c.idx for c in deck.cards)), 52)
+
+    def test_interned_cards(self):
+        card = Card(RANKS[4], SUITS[2])
+        self.assertIs(Card(RANKS[4], SUITS[2]), card)
+        self.assertIs(Card.from_idx(card.idx), card)
+        self.assertIs(copy.deepcopy(card), card)
+        # `player` is accepted for compatibility, and ignored.
+        self.assertIs(Card(RANKS[4], SUITS[2], player=1), card)
+        self.assertIs(Card.from_idx(card.idx, 1), card)
+        self.assertIs(pickle.loads(pickle.dumps(card)), card)
+        self.assertEqual(len({Card(r, s) for r in RANKS for s in SUITS}), 52)
+        self.assertEqual((card.value, card.rank_value), (5, 5))
+        self.assertEqual(card_to_idx(card), (5, 3))
+
+        with self.assertRaises(AttributeError):
+            card.rank = RANKS[5]
+
+        dummy = Card(0, SUITS[0])
+        self.assertIsNone(dummy.idx)
+        self.assertEqual(dummy, Card(0, SUITS[0]))
+        with self.assertRaises(ValueError):
+            dummy.state
+        with self.assertRaises(ValueError):
+            dummy.compact_state
+
+    def test_stack(self):
+        cards = [Card.from_idx(i) for i in (40, 3, 17, 29)]
+        hand = Stack(cards=cards)
+        self.assertEqual(hand.mask, core.mask_of([40, 3, 17, 29]))
+        self.assertIn(cards[2], hand)
+        self.assertNotIn(Card.from_idx(0), hand)
+
+        np.testing.assert_array_equal(hand.state,
+                                      sum(c.state for c in cards))
+        suit, rank = hand.compact_state
+        order = np.argsort([c.rank_value for c in cards])
+        for column, i in enumerate(order):
+            np.testing.assert_array_equal(suit[:, column],
+                                          cards[i].compact_state[0])
+            np.testing.assert_array_equal(rank[:, column],
+                                          cards[i].compact_state[1])
+
+        # Copies do not change the original.
+        bigger = hand.add(Card.from_idx(0))
+        smaller = hand.remove(cards[0])
+        self.assertEqual(len(hand), 4)
+        self.assertEqual(bigger.ids, [40, 3, 17, 29, 0])
+        self.assertEqual(smaller.ids, [3, 17, 29])
+        self.assertNotIn(cards[0], smaller)
+        self.assertIn(cards[0], hand)
+
+        hand.play(cards[1])
+        self.assertEqual(hand.ids, [40, 17, 29])
+        self.assertNotIn(cards[1], hand)
+        with self.assertRaises(ValueError):
+            hand.play(cards[1])
+
+        # Mutating the cards fails rather than silently doing nothing.
+        with self.assertRaises(AttributeError):
+            hand.cards.append(cards[1])
+        hand.cards = hand.cards + (cards[1],)
+        self.assertIn(cards[1], hand)
+
+        # The same card twice stays in the stack until both are played.
+        twice = Stack(cards=[cards[0], cards[1], cards[0]])
+        twice.play(cards[0])
+        self.assertIn(cards[0], twice)
+        twice.play(cards[0])
+        self.assertNotIn(cards[0], twice)
+        self.assertEqual(twice.ids, [3])
+
+    def test_dealt_to(self):
+        env = CribbageEnv(n_players=3, seed=0)
+        env.reset()
+        for player, hand in enumerate(env.hands):
+            for card in hand:
+                self.assertEqual(env.dealt_to(card), player)
+        self.assertIsNone(env.dealt_to(env.deck.cards[0]))
+
+    def test_seeded_games(self):
+
+        def play(env):
+            state, reward, done, debug = env.reset()
+            rewards = []
+            while not done:
+                action = state.hand[0] if env.phase < 2 else []
+                state, reward, done, debug = env.step(action)
+                rewards.append(reward)
+            return rewards
+
+        self.assertEqual(play(CribbageEnv(seed=3)), play(CribbageEnv(seed=3)))
+
+        env = CribbageEnv(seed=3)
+        first = play(env)
+        env.seed(3)
+        self.assertEqual(play(env), first)
+
+    def test_snapshot_restore(self):
+
+        def play(env, rng, n_steps):
+            rewards = []
+            state = env.state
+            for _ in range(n_steps):
+                if env.phase < 2:
+                    action = state.hand[rng.randint(0, len(state.hand) - 1)]
+                else:
+                    action = []
+                state, reward, done, debug = env.step(action)
+                rewards.append((reward, state.reward_id, state.hand_id,
+                                [c.idx for c in state.hand]))
+                if done:
+                    break
+            return rewards
+
+        env = CribbageEnv(seed=0)
+        env.reset()
+        play(env, random.Random(0), 30)
+
+        snapshot = env.snapshot(with_rng=True)
+        self.assertEqual(hash(snapshot), hash(env.snapshot(with_rng=True)))
+        expected = play(env, random.Random(1), 200)
+
+        env.restore(snapshot)
+        self.assertEqual(env.snapshot(with_rng=True), snapshot)
+        self.assertEqual(play(env, random.Random(1), 200), expected)
+
+        # A snapshot can be restored in another environment.
+        other = CribbageEnv()
+        other.reset()
+        other.restore(snapshot)
+        self.assertEqual(play(other, random.Random(1), 200), expected)
+
+    def test_discrete_actions(self):
+        env = CribbageEnv(seed=1)
+        state, reward, done, debug = env.reset()
+        rng = np.random.default_rng(1)
+
+        while not done:
+            mask = env.action_mask
+            self.assertEqual(mask.shape, (env.action_space.n,))
+            legal = np.flatnonzero(mask)
+            if env.phase < 2:
+                self.assertEqual(sorted(legal),
+                                 sorted(c.idx for c in state.hand))
+                with self.assertRaises(ValueError):
+                    env.step(ACTION_NOOP)
+            else:
+                self.assertEqual(legal.tolist(), [ACTION_NOOP])
+            state, reward, done, debug = env.step(rng.choice(legal))
+
     def test_card_to_idx(self):
         self.assertEqual(card_to_idx(Card(RANKS[0], SUITS[2])), (1, 3))
 
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from itertools import combinations
+
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.discard import (
+    _canonical_discard_ev,
+    build_crib_table,
+    crib_ev,
+    discard_ev,
+    permute_suits,
+)
+
+
+class DiscardEVTest(unittest.TestCase):
+
+    hand = [core.card_id(r, s) for r, s in
+            [(5, 0), (5, 1), (11, 1), (4, 2), (6, 3), (13, 0)]]
+
+    def test_matches_evaluate_cards(self):
+        ev = discard_ev(self.hand, is_dealer=True)
+        self.assertEqual(len(ev.discards), 15)
+
+        unknown = [c for c in range(core.N_CARDS) if c not in self.hand]
+        i = 3
+        discard = ev.discards[i]
+        kept = [c for c in self.hand if c not in discard]
+
+        hand_points = np.mean(
+            [core.evaluate_cards(kept, s) for s in unknown])
+        self.assertAlmostEqual(ev.hand[i], hand_points)
+
+        crib_points = []
+        for s in unknown:
+            rest = [c for c in unknown if c != s]
+            for others in combinations(rest, 2):
+                crib = list(discard) + list(others)
+                crib_points.append(core.evaluate_cards(crib, s, True))
+        self.assertAlmostEqual(ev.crib[i], np.mean(crib_points))
+
+        np.testing.assert_allclose(ev.total, ev.hand + ev.crib)
+        pone = discard_ev(self.hand, is_dealer=False)
+        np.testing.assert_allclose(pone.total, ev.hand - ev.crib)
+
+    def test_suit_permutation_is_cached(self):
+        ev = discard_ev(self.hand, is_dealer=False)
+        hits = _canonical_discard_ev.cache_info().hits
+
+        permutation = (2, 0, 3, 1)
+        permuted = [permute_suits(c, permutation) for c in self.hand]
+        permuted_ev = discard_ev(permuted, is_dealer=False)
+
+        self.assertEqual(_canonical_discard_ev.cache_info().hits, hits + 1)
+        np.testing.assert_allclose(permuted_ev.hand, ev.hand)
+        np.testing.assert_allclose(permuted_ev.crib, ev.crib)
+        self.assertEqual(
+            permuted_ev.best,
+            tuple(permute_suits(c, permutation) for c in ev.best)
+        )
+
+    def test_three_players(self):
+        ev = discard_ev(self.hand[:5], is_dealer=True, n_players=3)
+        self.assertEqual(ev.discards, [(c,) for c in self.hand[:5]])
+
+    def test_crib_table(self):
+        ev = discard_ev(self.hand, is_dealer=True)
+        table_ev = discard_ev(self.hand, is_dealer=True, crib_table=True)
+        np.testing.assert_allclose(table_ev.hand, ev.hand)
+        np.testing.assert_allclose(table_ev.crib, ev.crib, atol=1.0)
+
+        for i, discard in enumerate(table_ev.discards):
+            self.assertEqual(table_ev.crib[i], crib_ev(discard))
+            self.assertEqual(crib_ev(discard[::-1]), crib_ev(discard))
+            permuted = [permute_suits(c, (3, 2, 1, 0)) for c in discard]
+            self.assertEqual(crib_ev(permuted), crib_ev(discard))
+
+        with self.assertRaises(ValueError):
+            crib_ev(self.hand[:1])
+
+    def test_build_crib_table(self):
+        # 3 players throw one card each to a crib of 3.
+        table = build_crib_table(3, n_workers=2)
+        self.assertEqual(table.shape, (core.N_CARDS,))
+
+        jack = core.card_id(core.JACK, 2)
+        unknown = [c for c in range(core.N_CARDS) if c != jack]
+        points = [core.evaluate_cards([jack] + list(others), s, True)
+                  for s in unknown
+                  for others in combinations(
+                      [c for c in unknown if c != s], 2)]
+        self.assertAlmostEqual(table[jack], np.mean(points))
+
+    def test_wrong_hand_size(self):
+        with self.assertRaises(ValueError):
+            discard_ev(self.hand[:5], is_dealer=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs.core import ACTION_NOOP
+from gym_cribbage.envs.cribbage_env import CribbageEnv
+from gym_cribbage.envs.observation import (
+    OBS_DEALER,
+    OBS_HAND,
+    OBS_MASK,
+    OBS_PHASE,
+    OBS_SCORES,
+    OBS_TABLE,
+    OBS_TABLE_VALUE,
+)
+
+
+class ObservationTest(unittest.TestCase):
+
+    def test_numeric_observations(self):
+        env = CribbageEnv(n_players=3, seed=0, obs_mode="numeric")
+        obs, reward, done, debug = env.reset()
+        buffer = obs
+
+        while not done:
+            self.assertIs(obs, buffer)
+            self.assertTrue(env.observation_space.contains(obs))
+
+            player = env.player
+            hand = np.flatnonzero(obs[OBS_HAND])
+            self.assertEqual(hand.tolist(), sorted(env.hands[player].ids))
+
+            mask = np.flatnonzero(obs[OBS_MASK])
+            if env.phase < 2:
+                self.assertEqual(mask.tolist(),
+                                 sorted(c.idx for c in env.state.hand))
+            else:
+                self.assertEqual(mask.tolist(), [ACTION_NOOP])
+
+            table = obs[OBS_TABLE]
+            self.assertEqual((table[table > 0] - 1).tolist(), env.table.ids)
+            self.assertEqual(obs[OBS_TABLE_VALUE], env.table_value)
+            self.assertEqual(obs[OBS_DEALER], player == env.dealer)
+            self.assertEqual(np.argmax(obs[OBS_PHASE]), env.phase)
+            self.assertEqual(obs[OBS_SCORES][0], env.scores[player])
+            self.assertEqual(obs[OBS_SCORES][1],
+                             env.scores[(player + 1) % 3])
+            self.assertEqual(obs[OBS_SCORES][3], 0)
+
+            if env.phase < 2:
+                action = env.state.hand[0]
+            else:
+                action = []
+            obs, reward, done, debug = env.step(action)
+
+    def test_object_mode(self):
+        env = CribbageEnv()
+        state, reward, done, debug = env.reset()
+        self.assertIs(state, env.state)
+
+        with self.assertRaises(ValueError):
+            CribbageEnv(obs_mode="pixels")
+
+
+if __name__ == '__main__':
+    unittest.main()
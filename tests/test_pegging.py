@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.cribbage_env import CribbageEnv, evaluate_table
+from gym_cribbage.envs.pegging import PeggingState
+
+
+class PeggingStateTest(unittest.TestCase):
+
+    def test_matches_evaluate_table(self):
+        rng = random.Random(0)
+        deck = list(range(core.N_CARDS))
+        pegging = PeggingState()
+        for _ in range(5000):
+            rng.shuffle(deck)
+            pegging.reset()
+            table = []
+            for card in deck:
+                if core.table_value(table) + core.VALUE_OF[card] > 31:
+                    break
+                table.append(card)
+                self.assertEqual(pegging.play(card),
+                                 core.evaluate_table(table))
+                self.assertEqual(pegging.total, core.table_value(table))
+
+    def test_runs_after_pairs(self):
+        # 3 3 4 5 2: a pair, a fifteen and a run of three, then a run of four.
+        pegging = PeggingState()
+        points = [pegging.play(core.card_id(r, s))
+                  for r, s in [(3, 0), (3, 1), (4, 0), (5, 0), (2, 0)]]
+        self.assertEqual(points, [0, 2, 0, 5, 4])
+
+    def test_past_31(self):
+        # The environment does not forbid going over 31.
+        pegging = PeggingState()
+        table = [core.card_id(13, s) for s in range(4)] + [core.card_id(5, 0)]
+        for i, card in enumerate(table):
+            self.assertEqual(pegging.play(card),
+                             core.evaluate_table(table[:i + 1]))
+        self.assertEqual(pegging.total, 45)
+
+        # Runs whose low cards the automaton drops once past 31.
+        for table in ([33, 29, 43, 26, 6, 1, 2, 44],
+                      [10, 41, 5, 29, 40, 13, 47, 33, 4, 45]):
+            pegging.reset()
+            for i, card in enumerate(table):
+                self.assertEqual(pegging.play(card),
+                                 core.evaluate_table(table[:i + 1]))
+
+    def test_random_past_31(self):
+        rng = random.Random(1)
+        deck = list(range(core.N_CARDS))
+        pegging = PeggingState()
+        for _ in range(2000):
+            rng.shuffle(deck)
+            pegging.reset()
+            for i, card in enumerate(deck[:12]):
+                self.assertEqual(pegging.play(card),
+                                 core.evaluate_table(deck[:i + 1]))
+
+    def test_env_rewards(self):
+        # The Play rewards of the environment are still those of
+        # evaluate_table, plus at most 2 points for the last card.
+        env = CribbageEnv()
+        state, reward, done, debug = env.reset()
+        while not done:
+            if env.phase == 1:
+                expected = evaluate_table(list(env.table) + [state.hand[0]])
+                state, reward, done, debug = env.step(state.hand[0])
+                self.assertIn(reward - expected, (0, 1, 2))
+            elif env.phase == 0:
+                state, reward, done, debug = env.step(state.hand[0])
+            else:
+                state, reward, done, debug = env.step([])
+
+
+if __name__ == '__main__':
+    unittest.main()
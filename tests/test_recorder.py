@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.cribbage_env import CribbageEnv, Stack
+from gym_cribbage.envs.observation import MAX_TABLE_CARDS
+from gym_cribbage.envs.recorder import (
+    HEADER_SIZE,
+    RECORD_DTYPE,
+    TABLE_PAD,
+    TrajectoryRecorder,
+    read_trajectories,
+)
+
+
+def play_games(env, n_games, seed=0):
+    rng = np.random.default_rng(seed)
+    rewards = []
+    for _ in range(n_games):
+        env.reset()
+        done = False
+        while not done:
+            _, reward, done, _ = env.step(
+                int(rng.choice(np.flatnonzero(env.action_mask))))
+            rewards.append(reward)
+    return rewards
+
+
+class TrajectoryRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "games.traj")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_replay(self):
+        with TrajectoryRecorder(CribbageEnv(seed=0), self.path,
+                                buffer_size=100) as env:
+            rewards = play_games(env, 2)
+            scores = env.scores.copy()
+
+        records = read_trajectories(self.path)
+        self.assertEqual(
+            os.path.getsize(self.path),
+            HEADER_SIZE + len(rewards) * RECORD_DTYPE.itemsize
+        )
+        self.assertEqual(len(records), len(rewards))
+        np.testing.assert_array_equal(records["reward"], rewards)
+        self.assertEqual(records["done"].sum(), 2)
+        np.testing.assert_array_equal(records["scores"][-1][:2], scores)
+
+        # Replaying the recorded actions gives the same game.
+        env = CribbageEnv(seed=0)
+        env.reset()
+        for record in records[:np.flatnonzero(records["done"])[0] + 1]:
+            self.assertEqual(record["actor"], env.player)
+            self.assertEqual(record["phase"], env.phase)
+            self.assertEqual(record["hand"], env.hands[env.player].mask)
+            table = record["table"][:record["table_len"]]
+            self.assertEqual(list(table), env.table.ids)
+            self.assertTrue((record["table"][record["table_len"]:]
+                             == TABLE_PAD).all())
+            _, reward, _, _ = env.step(int(record["action"]))
+            self.assertEqual(record["reward"], reward)
+            self.assertEqual(record["reward_id"], env.state.reward_id)
+
+        # Hands hold the action during The Deal and The Play.
+        played = records[records["phase"] < 2]
+        self.assertTrue(
+            ((played["hand"] >> played["action"].astype(np.uint64)) & 1).all())
+        self.assertTrue((records["action"][records["phase"] == 2]
+                         == core.ACTION_NOOP).all())
+
+    def test_win_prob_rewards(self):
+        with TrajectoryRecorder(CribbageEnv(seed=0, reward_mode="win_prob"),
+                                self.path) as env:
+            rewards = play_games(env, 1)
+
+        records = read_trajectories(self.path)
+        self.assertTrue(np.count_nonzero(rewards))
+        np.testing.assert_allclose(records["reward"], rewards, atol=1e-6)
+
+    def test_table_past_31(self):
+        with TrajectoryRecorder(CribbageEnv(seed=0), self.path) as env:
+            env.reset()
+            while env.phase == 0:
+                env.step(int(np.flatnonzero(env.action_mask)[0]))
+            # The environment does not stop a count going past 31.
+            ids = [c.idx for c in env.deck.cards[:MAX_TABLE_CARDS + 2]]
+            env.env.table = Stack.from_ids(ids)
+            env.step(int(np.flatnonzero(env.action_mask)[0]))
+
+        record = read_trajectories(self.path)[-1]
+        self.assertEqual(list(record["table"]), ids[:MAX_TABLE_CARDS])
+        self.assertEqual(record["table_len"], len(ids))
+
+    def test_copy(self):
+        with TrajectoryRecorder(CribbageEnv(seed=0), self.path) as env:
+            self.assertIs(copy.copy(env).env, env.env)
+
+    def test_append(self):
+        with TrajectoryRecorder(CribbageEnv(seed=0), self.path) as env:
+            n_steps = len(play_games(env, 1))
+        self.assertIsInstance(read_trajectories(self.path), np.memmap)
+
+        with TrajectoryRecorder(CribbageEnv(seed=1), self.path) as env:
+            n_steps += len(play_games(env, 1))
+        self.assertEqual(len(read_trajectories(self.path)), n_steps)
+
+        with self.assertRaises(ValueError):
+            TrajectoryRecorder(CribbageEnv(n_players=3), self.path)
+
+    def test_not_a_trajectory_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 100)
+        with self.assertRaises(ValueError):
+            read_trajectories(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs.cribbage_env import CribbageEnv
+from gym_cribbage.envs.simulate import simulate
+
+
+def choose(player, playable, table):
+    """Deterministic choice, spread over the legal cards."""
+    playable = sorted(playable)
+    return playable[(sum(table) + 7 * player) % len(playable)]
+
+
+def policy(turn):
+    return choose(turn.player, turn.playable, turn.table)
+
+
+class SimulateTest(unittest.TestCase):
+
+    def test_same_games_as_env(self):
+        for n_players in (2, 3, 4):
+            n_games = 3
+            result = simulate(n_games, [policy] * n_players, seed=n_players)
+
+            env = CribbageEnv(n_players=n_players, seed=n_players)
+            for game in range(n_games):
+                env.reset()
+                phase_points = np.zeros((n_players, 3), dtype=int)
+                done = False
+                while not done:
+                    phase = env.phase
+                    action = choose(env.player,
+                                    np.flatnonzero(env.action_mask).tolist(),
+                                    env.table.ids)
+                    _, reward, done, _ = env.step(action)
+                    phase_points[env.state.reward_id, phase] += reward
+
+                np.testing.assert_array_equal(result.scores[game], env.scores)
+                np.testing.assert_array_equal(result.phase_points[game],
+                                              phase_points)
+                self.assertEqual(result.winners[game],
+                                 np.argmax(env.scores))
+
+    def test_dealer(self):
+        result = simulate(2, [policy] * 2, seed=0, dealer=1)
+
+        env = CribbageEnv(seed=0)
+        for game in range(2):
+            env.reset(dealer=1)
+            done = False
+            while not done:
+                action = choose(env.player,
+                                np.flatnonzero(env.action_mask).tolist(),
+                                env.table.ids)
+                _, _, done, _ = env.step(action)
+            np.testing.assert_array_equal(result.scores[game], env.scores)
+
+    def test_results(self):
+        rng = np.random.default_rng(0)
+
+        def random_policy(turn):
+            return turn.playable[rng.integers(len(turn.playable))]
+
+        result = simulate(20, [random_policy] * 2, seed=0)
+        self.assertTrue((result.scores.max(axis=1) >= 121).all())
+        np.testing.assert_array_equal(result.phase_points.sum(axis=2),
+                                      result.scores)
+        np.testing.assert_array_equal(
+            result.margins,
+            np.abs(result.scores[:, 0] - result.scores[:, 1]))
+        self.assertAlmostEqual(result.win_rates.sum(), 1)
+
+    def test_illegal_play(self):
+        def bad_policy(turn):
+            return turn.hand[0] if turn.phase == 0 else -1
+
+        with self.assertRaises(ValueError):
+            simulate(1, [bad_policy] * 2, seed=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
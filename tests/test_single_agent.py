@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs.single_agent import (
+    SingleAgentVectorEnv,
+    random_opponent,
+)
+
+
+class SingleAgentVectorEnvTest(unittest.TestCase):
+
+    def test_learner_always_acts(self):
+        for n_players, seat in [(2, 0), (2, 1), (3, 2), (4, 1)]:
+            calls = []
+            opponent = random_opponent(np.random.default_rng(0))
+
+            def counting(state, action_mask):
+                calls.append(len(action_mask))
+                self.assertTrue((state.hand_id != seat).all())
+                self.assertTrue((state.phase < 2).all())
+                return opponent(state, action_mask)
+
+            env = SingleAgentVectorEnv(16, counting, seat=seat,
+                                       n_players=n_players, seed=0)
+            state = env.reset()
+            learner = random_opponent(np.random.default_rng(1))
+            n_games = 0
+            total = np.zeros(16, dtype=np.int64)
+            for _ in range(120):
+                self.assertTrue((state.hand_id == seat).all())
+                self.assertTrue((state.phase < 2).all())
+                state, rewards, dones, info = env.step(
+                    learner(state, env.action_mask))
+
+                total += rewards
+                n_games += dones.sum()
+                self.assertTrue((info["winner"][dones] >= 0).all())
+                self.assertTrue((info["winner"][~dones] == -1).all())
+                total[dones] = 0
+
+            self.assertGreater(n_games, 0)
+            # One call per turn, however many games need the opponent.
+            self.assertLessEqual(max(calls), 16)
+            self.assertGreater(np.mean(calls), 1)
+
+    def test_rewards_and_winners(self):
+        env = SingleAgentVectorEnv(8, random_opponent(np.random.default_rng(0)),
+                                   seed=1)
+        learner = random_opponent(np.random.default_rng(1))
+        state = env.reset()
+        scores = np.zeros(8, dtype=np.int64)
+        n_games = 0
+        for _ in range(150):
+            state, rewards, dones, info = env.step(
+                learner(state, env.action_mask))
+            scores += rewards
+            for game in np.flatnonzero(dones):
+                # The learner won if and only if they reached 121.
+                self.assertEqual(info["winner"][game] == 0,
+                                 scores[game] >= 121)
+            scores[dones] = 0
+            n_games += dones.sum()
+            # The learner's points are those of its seat in the env.
+            np.testing.assert_array_equal(scores, env.env.scores[:, 0])
+        self.assertGreater(n_games, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
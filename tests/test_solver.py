@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.pegging import PeggingState
+from gym_cribbage.envs.solver import PeggingSolver, count_of, play_rank
+
+
+def minimax(hands, player, table):
+    """Plain search of The Play, scored with evaluate_table."""
+    total = sum(core.VALUE_OF[c] for c in table)
+    best = None
+    for card in core.playable(hands[player], total):
+        next_hands = [list(h) for h in hands]
+        next_hands[player].remove(card)
+        next_table = table + [card]
+        points = core.evaluate_table(next_table)
+        total = core.table_value(next_table)
+
+        can_play = [len(core.playable(h, total)) > 0 for h in next_hands]
+        if can_play[1 - player]:
+            next_player = 1 - player
+        elif can_play[player]:
+            next_player = player
+        else:
+            points += 2 if total == core.MAX_TABLE_VALUE else 1
+            next_table = []
+            if not next_hands[0] and not next_hands[1]:
+                next_player = None
+            elif next_hands[1 - player]:
+                next_player = 1 - player
+            else:
+                next_player = player
+
+        if next_player is None:
+            value = points
+        elif next_player == player:
+            value = points + minimax(next_hands, player, next_table)
+        else:
+            value = points - minimax(next_hands, next_player, next_table)
+
+        if best is None or value > best:
+            best = value
+    return best
+
+
+class PeggingSolverTest(unittest.TestCase):
+
+    def test_play_rank(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            state = PeggingState()
+            count = count_of([])
+            for card in rng.permutation(core.N_CARDS)[:8]:
+                if state.total + core.VALUE_OF[card] > core.MAX_TABLE_VALUE:
+                    break
+                points, count = play_rank(count, core.RANK_OF[card])
+                self.assertEqual(points, state.play(card))
+                self.assertEqual(count, (state.total, state.state))
+
+    def test_matches_minimax(self):
+        rng = np.random.default_rng(1)
+        solver = PeggingSolver()
+        for n_cards in (2, 3, 4):
+            for _ in range(10):
+                cards = rng.permutation(core.N_CARDS)[:2 * n_cards].tolist()
+                hands = [cards[:n_cards], cards[n_cards:]]
+                value, card = solver.solve(hands, 0)
+                self.assertEqual(value, minimax(hands, 0, []))
+
+                # The card is optimal. On a new count, the opponent can
+                # always answer it.
+                self.assertIn(card, hands[0])
+                rest = [[c for c in hands[0] if c != card], hands[1]]
+                self.assertEqual(value, core.evaluate_table([card])
+                                 - minimax(rest, 1, [card]))
+
+    def test_mid_count(self):
+        # 5, 10 on the table: the player to move pegs 31 with two 8s.
+        eights = [core.card_id(8, 0), core.card_id(8, 1)]
+        hands = [eights, [core.card_id(13, 0)]]
+        table = [core.card_id(5, 2), core.card_id(10, 2)]
+        value, card = PeggingSolver().solve(hands, 0, table)
+        self.assertEqual(value, minimax(hands, 0, table))
+        self.assertIn(card, eights)
+
+        with self.assertRaises(ValueError):
+            PeggingSolver().solve([[core.card_id(13, 1)], []], 0,
+                                  table + eights)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from itertools import combinations, product
+
+import numpy as np
+
+from gym_cribbage.envs import core, tables
+from gym_cribbage.envs.cribbage_env import (
+    Card,
+    RANKS,
+    SUITS,
+    Stack,
+    evaluate_cards,
+    is_sequence,
+    same_suit_points,
+)
+
+
+def evaluate_cards_reference(cards, starter=None, is_crib=False):
+    """Scores a hand by enumerating every combination of cards."""
+    if len(cards) == 1:
+        return 0
+
+    hand = list(cards) + ([starter] if starter is not None else [])
+    points = same_suit_points(cards, starter, is_crib)
+
+    for left, right in combinations(hand, 2):
+        if left.rank_value == right.rank_value:
+            points += 2
+
+    for length in range(len(hand), 2, -1):
+        runs = [c for c in combinations(hand, length) if is_sequence(c)]
+        if runs:
+            points += length * len(runs)
+            break
+
+    for length in range(2, len(hand) + 1):
+        for combination in combinations(hand, length):
+            if sum(c.value for c in combination) == 15:
+                points += 2
+
+    if starter is not None:
+        for card in cards:
+            if card.rank == "J" and card.suit == starter.suit:
+                points += 1
+
+    return points
+
+
+def score_hands(seed):
+    """Scores random hands, in a worker process building the tables."""
+    rng = random.Random(seed)
+    hands = [rng.sample(range(core.N_CARDS), 5) for _ in range(20)]
+    return [core.evaluate_cards(h[:4], h[4]) for h in hands]
+
+
+class ShowTableTest(unittest.TestCase):
+
+    def test_evaluate_cards_matches_reference(self):
+        rng = random.Random(0)
+        deck = [Card(rank, suit) for rank, suit in product(RANKS, SUITS)]
+        for _ in range(2000):
+            cards = rng.sample(deck, 5)
+            hand, starter = Stack(cards=cards[:4]), cards[4]
+            for is_crib in (False, True):
+                self.assertEqual(
+                    evaluate_cards(hand, starter, is_crib),
+                    evaluate_cards_reference(hand, starter, is_crib)
+                )
+
+    def test_small_hands(self):
+        # A three card crib, as dealt with three players.
+        hand = Stack(cards=[Card(5, SUITS[0]), Card(5, SUITS[1]),
+                            Card("J", SUITS[2])])
+        starter = Card(4, SUITS[2])
+        self.assertEqual(evaluate_cards(hand, starter, True),
+                         evaluate_cards_reference(hand, starter, True))
+
+    def test_show_key_is_order_independent(self):
+        self.assertEqual(tables.show_key([5, 11, 5, 5, 5]),
+                         tables.show_key([5, 5, 5, 11, 5]))
+        self.assertNotEqual(tables.show_key([1, 2]),
+                            tables.show_key([1, 2, 3]))
+
+    def test_table_is_saved_and_loaded(self):
+        table_dir = tempfile.mkdtemp()
+        old_dir, old_tables = tables.TABLE_DIR, dict(tables._TABLES)
+        try:
+            tables.TABLE_DIR = table_dir
+            tables._TABLES.clear()
+            built = tables.get_table("show")
+            path = os.path.join(table_dir, "show.npy")
+            self.assertTrue(os.path.exists(path))
+            # Other users can read the saved table.
+            self.assertEqual(os.stat(path).st_mode & 0o777,
+                             tables.TABLE_FILE_MODE)
+
+            tables._TABLES.clear()
+            loaded = tables.get_table("show")
+            np.testing.assert_array_equal(built, loaded)
+        finally:
+            tables.TABLE_DIR = old_dir
+            tables._TABLES.clear()
+            tables._TABLES.update(old_tables)
+            shutil.rmtree(table_dir)
+
+    def test_unreadable_table_is_built(self):
+        table_dir = tempfile.mkdtemp()
+        old_dir, old_tables = tables.TABLE_DIR, dict(tables._TABLES)
+        try:
+            tables.TABLE_DIR = table_dir
+            tables._TABLES.clear()
+            # A path that cannot be read as a table, whoever runs the tests.
+            os.mkdir(os.path.join(table_dir, "show.npy"))
+            with self.assertLogs(tables.logger, "WARNING"):
+                table = tables.get_table("show")
+            np.testing.assert_array_equal(
+                table, tables.build_table("show", save=False))
+        finally:
+            tables.TABLE_DIR = old_dir
+            tables._TABLES.clear()
+            tables._TABLES.update(old_tables)
+            shutil.rmtree(table_dir)
+
+    def test_concurrent_builds(self):
+        # Workers building the same tables at once in an empty directory
+        # must never read a partly written file.
+        table_dir = tempfile.mkdtemp()
+        old_dir = os.environ.get("GYM_CRIBBAGE_TABLE_DIR")
+        os.environ["GYM_CRIBBAGE_TABLE_DIR"] = table_dir
+        try:
+            with ProcessPoolExecutor(
+                    8, mp_context=mp.get_context("spawn")) as executor:
+                results = list(executor.map(score_hands, range(16)))
+        finally:
+            if old_dir is None:
+                del os.environ["GYM_CRIBBAGE_TABLE_DIR"]
+            else:
+                os.environ["GYM_CRIBBAGE_TABLE_DIR"] = old_dir
+            files = os.listdir(table_dir)
+            shutil.rmtree(table_dir)
+
+        self.assertEqual(results, [score_hands(i) for i in range(16)])
+        self.assertIn("show.npy", files)
+        self.assertFalse([f for f in files if f.endswith(".tmp")])
+
+
+class PeggingTableTest(unittest.TestCase):
+
+    table = tables.get_table("pegging")
+
+    def points(self, ranks):
+        """Points of the last rank of `ranks` according to the table."""
+        state, total = 0, 0
+        for rank in ranks:
+            entry = int(self.table[state, rank])
+            self.assertNotEqual(entry, tables.PEGGING_INVALID)
+            state = entry >> tables.PEGGING_POINT_BITS
+            total += tables.rank_value(rank)
+        points = entry & tables.PEGGING_POINT_MASK
+        return points + 2 if total == 15 else points
+
+    @staticmethod
+    def cards(ranks):
+        """Card ids of the ranks, with a different suit for repeats."""
+        return [core.card_id(r, ranks[:i].count(r) % core.N_SUITS)
+                for i, r in enumerate(ranks)]
+
+    def test_every_transition(self):
+        # Shortest rank sequence reaching each state.
+        paths = {0: ()}
+        queue = [0]
+        for state in queue:
+            for rank in range(1, tables.RANK_BASE):
+                entry = int(self.table[state, rank])
+                if entry == tables.PEGGING_INVALID:
+                    continue
+                ranks = paths[state] + (rank,)
+                self.assertEqual(self.points(ranks),
+                                 core.evaluate_table(self.cards(ranks)))
+
+                next_state = entry >> tables.PEGGING_POINT_BITS
+                if next_state not in paths:
+                    paths[next_state] = ranks
+                    queue.append(next_state)
+
+        self.assertEqual(len(paths), len(self.table))
+
+    def test_short_sequences(self):
+        ranks = range(1, tables.RANK_BASE)
+        for length in range(1, 5):
+            for sequence in product(ranks, repeat=length):
+                if sum(tables.rank_value(r) for r in sequence) > 31:
+                    continue
+                self.assertEqual(self.points(sequence),
+                                 core.evaluate_table(self.cards(sequence)))
+
+    def test_invalid_past_31(self):
+        kings = [13, 13, 13]
+        state = 0
+        for rank in kings:
+            state = int(self.table[state, rank]) >> tables.PEGGING_POINT_BITS
+        self.assertEqual(self.table[state, 2], tables.PEGGING_INVALID)
+        self.assertNotEqual(self.table[state, 1], tables.PEGGING_INVALID)
+
+
+if __name__ == '__main__':
+    unittest.main()
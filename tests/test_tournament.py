@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs import core
+from gym_cribbage.envs.tournament import Tournament, bradley_terry
+
+
+def lowest(turn):
+    return min(turn.playable, key=lambda c: core.VALUE_OF[c])
+
+
+def highest(turn):
+    return max(turn.playable, key=lambda c: core.VALUE_OF[c])
+
+
+def first(turn):
+    return turn.playable[0]
+
+
+POLICIES = {"lowest": lowest, "highest": highest, "first": first}
+
+
+class BradleyTerryTest(unittest.TestCase):
+
+    def test_ratings(self):
+        ratings, stderr = bradley_terry([[0, 50], [50, 0]])
+        np.testing.assert_allclose(ratings, 0, atol=1e-9)
+
+        wins = np.array([[0, 75, 90], [25, 0, 75], [10, 25, 0]])
+        ratings, stderr = bradley_terry(wins, prior=1e6)
+        self.assertTrue(ratings[0] > ratings[1] > ratings[2])
+        # 75% wins between neighbours: a log-odds difference of log(3).
+        np.testing.assert_allclose(np.diff(ratings), -np.log(3), rtol=0.1)
+        self.assertTrue((stderr > 0).all())
+
+        # Undefeated players keep finite ratings.
+        ratings, stderr = bradley_terry([[0, 10], [0, 0]])
+        self.assertTrue(np.isfinite(ratings).all())
+
+
+class TournamentTest(unittest.TestCase):
+
+    def test_round_robin(self):
+        tournament = Tournament(POLICIES, games_per_match=8, chunk_size=4,
+                                n_workers=0)
+        results = list(tournament.run())
+        self.assertEqual(len(results), 3 * 2)
+        for result in results:
+            self.assertEqual(sum(result.wins), 4)
+
+        wins = tournament.wins()
+        self.assertEqual((wins + wins.T).sum(), 3 * 8 * 2)
+        self.assertEqual(len(tournament.ratings().elo), 3)
+
+        # Worker processes play the same games.
+        parallel = Tournament(POLICIES, games_per_match=8, chunk_size=4,
+                              n_workers=2)
+        list(parallel.run())
+        np.testing.assert_array_equal(parallel.wins(), wins)
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, "results.jsonl")
+            kwargs = dict(games_per_match=8, chunk_size=4, n_workers=0,
+                          schedule="swiss", n_rounds=2, checkpoint=checkpoint)
+
+            run = Tournament(POLICIES, **kwargs).run()
+            for _ in range(3):
+                next(run)
+            run.close()
+
+            resumed = Tournament(POLICIES, **kwargs)
+            self.assertEqual(len(resumed.results), 3)
+            self.assertEqual(len(list(resumed.run())), 1)
+
+            complete = Tournament(POLICIES, **dict(kwargs, checkpoint=None))
+            list(complete.run())
+            np.testing.assert_array_equal(resumed.wins(), complete.wins())
+
+    def test_swiss_pairings(self):
+        names = ["a", "b", "c", "d"]
+        tournament = Tournament({n: first for n in names}, schedule="swiss",
+                                n_workers=0)
+        self.assertEqual(tournament.n_rounds, 2)
+        pairs = tournament.pairings(0)
+        self.assertEqual(sorted(sum(pairs, ())), names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs import trace
+from gym_cribbage.envs.cribbage_env import CribbageEnv
+
+
+def play_game(env, seed=0):
+    rng = np.random.default_rng(seed)
+    env.reset()
+    done = False
+    while not done:
+        _, _, done, _ = env.step(
+            rng.choice(np.flatnonzero(env.action_mask)))
+
+
+class TraceTest(unittest.TestCase):
+
+    def test_points_match_scores(self):
+        for n_players in (2, 3, 4):
+            env = CribbageEnv(n_players=n_players, seed=n_players)
+            events = trace.RingBuffer(capacity=None)
+            env.set_trace(events)
+            play_game(env)
+
+            points = np.zeros(n_players, dtype=int)
+            for event in events:
+                points[event.player] += event.points
+            np.testing.assert_array_equal(points, env.scores)
+
+            kinds = [event.kind for event in events]
+            self.assertEqual(kinds[0], trace.NEW_HAND)
+            self.assertEqual(kinds[-1], trace.GAME_OVER)
+            self.assertEqual(
+                kinds.count(trace.DEAL),
+                kinds.count(trace.NEW_HAND) * (6 if n_players == 2 else 5)
+                * n_players
+            )
+
+    def test_ring_buffer_is_bounded(self):
+        env = CribbageEnv(seed=0)
+        events = trace.RingBuffer(capacity=10)
+        env.set_trace(events)
+        play_game(env)
+        self.assertEqual(len(events), 10)
+        self.assertEqual(list(events)[-1].kind, trace.GAME_OVER)
+
+        env.set_trace(None)
+        events.clear()
+        play_game(env)
+        self.assertEqual(len(events), 0)
+
+    def test_verbose(self):
+        env = CribbageEnv(verbose=True, seed=0)
+        with self.assertLogs(env.logger, level=logging.DEBUG) as logs:
+            env.reset()
+        self.assertTrue(logs.output[0].endswith(
+            "new_hand  player={} card=- points=0 value=0".format(env.dealer)))
+
+
+if __name__ == '__main__':
+    unittest.main()
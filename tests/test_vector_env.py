@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs.cribbage_env import Card, CribbageEnv, Stack
+from gym_cribbage.envs.vector_env import (
+    MAX_ROUND_VALUE,
+    CribbageVectorEnv,
+    unpack,
+)
+
+
+def sync_hand(env, venv, game):
+    """Deals the cards of `game` in venv to env."""
+    n_dealt = env._cards_per_hand * env.n_players
+    deck = venv.deck[game].tolist()
+    for i in range(env.n_players):
+        cards = deck[i * env._cards_per_hand:(i + 1) * env._cards_per_hand]
+        env.hands[i] = Stack.from_ids(cards)
+    env.deck.cards = [Card.from_idx(c) for c in deck[n_dealt:]]
+    env.state.hand = env.hands[env.player]
+
+
+class CribbageVectorEnvTest(unittest.TestCase):
+
+    def _play(self, n_players, n_steps, seed):
+        rng = np.random.default_rng(seed)
+        venv = CribbageVectorEnv(1, n_players=n_players, seed=seed)
+        state, players = venv.reset()
+
+        env = CribbageEnv(n_players=n_players)
+        env.reset(dealer=int(venv.dealer[0]))
+        sync_hand(env, venv, 0)
+
+        for _ in range(n_steps):
+            if state.phase[0] < 2:
+                legal = np.flatnonzero(unpack(state.hand[0]))
+                action = int(rng.choice(legal))
+                card = [c for c in env.hands[env.player]
+                        if c.idx == action][0]
+            else:
+                action, card = 0, []
+
+            state, rewards, dones, players = venv.step([action])
+            _, reward, done, _ = env.step(card)
+
+            self.assertEqual(rewards[0], reward)
+            self.assertEqual(dones[0], done)
+            self.assertEqual(state.reward_id[0], env.state.reward_id)
+
+            if done:
+                env.reset(dealer=int(venv.dealer[0]))
+                sync_hand(env, venv, 0)
+                continue
+
+            if env.new_hand:
+                sync_hand(env, venv, 0)
+
+            self.assertEqual(players[0], env.player)
+            self.assertEqual(state.phase[0], env.phase)
+            self.assertEqual(state.hand[0], Stack(env.state.hand).mask)
+            self.assertEqual(venv.scores[0].tolist(), env.scores.tolist())
+
+    def test_matches_cribbage_env(self):
+        for n_players in (2, 3, 4):
+            self._play(n_players, n_steps=1500, seed=n_players)
+
+    def test_many_games(self):
+        venv = CribbageVectorEnv(64, n_players=2, seed=0)
+        state, players = venv.reset()
+        rng = np.random.default_rng(0)
+        n_done = 0
+
+        for _ in range(1000):
+            actions = np.zeros(venv.n_envs, dtype=np.int64)
+            for i, hand in enumerate(unpack(state.hand)):
+                if hand.any():
+                    actions[i] = rng.choice(np.flatnonzero(hand))
+            state, rewards, dones, players = venv.step(actions)
+            n_done += dones.sum()
+            self.assertTrue((venv.scores < MAX_ROUND_VALUE).all())
+
+        self.assertGreater(n_done, 0)
+
+    def test_illegal_action(self):
+        venv = CribbageVectorEnv(2, seed=0)
+        state, players = venv.reset()
+        held = venv.hands[1, players[1]]
+        card = np.flatnonzero(~unpack(held))[0]
+        with self.assertRaises(ValueError):
+            venv.step([0, card])
+
+
+if __name__ == '__main__':
+    unittest.main()
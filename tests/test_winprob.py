@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_cribbage.envs.bots import RandomBot
+from gym_cribbage.envs.cribbage_env import CribbageEnv, MAX_ROUND_VALUE
+from gym_cribbage.envs.winprob import (
+    DEALER_PLAY,
+    HEELS,
+    PONE_PLAY,
+    sample_hands,
+    win_prob_table,
+    win_probabilities,
+    win_probability,
+)
+
+
+class WinProbTest(unittest.TestCase):
+
+    def test_sample_hands(self):
+        points = sample_hands(50, [RandomBot(0), RandomBot(1)], seed=0)
+        self.assertEqual(points.shape, (50, 5))
+        self.assertTrue(np.isin(points[:, HEELS], (0, 2)).all())
+        # The last card of The Play always scores.
+        self.assertTrue((points[:, PONE_PLAY] + points[:, DEALER_PLAY] >=
+                         1).all())
+
+    def test_race(self):
+        # Both players peg 1 point per hand and nothing else.
+        points = np.zeros((1, 5), dtype=np.int64)
+        points[:, [PONE_PLAY, DEALER_PLAY]] = 1
+        dealer = win_probabilities(points)[1]
+
+        last = MAX_ROUND_VALUE - 1
+        self.assertEqual(dealer[last, last], 0)  # The pone pegs first.
+        self.assertEqual(dealer[last, last - 1], 1)
+        self.assertEqual(dealer[last - 1, last], 0)
+        self.assertEqual(dealer[0, 0], 0)
+
+    def test_table(self):
+        table = win_prob_table()
+        size = MAX_ROUND_VALUE + 1
+        self.assertEqual(table.shape, (2, size, size))
+
+        np.testing.assert_allclose(
+            table[0][:-1, :-1], 1 - table[1].T[:-1, :-1], atol=1e-6)
+        self.assertTrue((table[:, -1, :-1] == 1).all())
+        self.assertTrue((table[:, :-1, -1] == 0).all())
+        self.assertTrue(0 <= table.min() and table.max() <= 1)
+
+        # The first dealer has the edge.
+        self.assertTrue(0.5 < win_probability(0, 0, True) < 0.65)
+        self.assertGreater(win_probability(100, 90, False),
+                           win_probability(90, 100, False))
+        self.assertEqual(win_probability(130, 100, False), 1)
+
+    def test_env_rewards(self):
+        env = CribbageEnv(seed=0, reward_mode="win_prob")
+
+        _, _, done, _ = env.reset()
+        while not done:
+            scores = env.scores.astype(int)
+            action = np.flatnonzero(env.action_mask)[0] \
+                if env.phase < 2 else 52
+            _, reward, done, _ = env.step(action)
+
+            player = env.state.reward_id
+            points = int(env.scores[player]) - scores[player]
+            self.assertIsInstance(reward, float)
+            if points == 0:
+                self.assertEqual(reward, 0)
+            else:
+                self.assertGreater(reward, 0)
+
+        self.assertGreaterEqual(max(env.scores), MAX_ROUND_VALUE)
+
+    def test_env_options(self):
+        with self.assertRaises(ValueError):
+            CribbageEnv(reward_mode="elo")
+        with self.assertRaises(ValueError):
+            CribbageEnv(n_players=3, reward_mode="win_prob")
+
+
+if __name__ == '__main__':
+    unittest.main()